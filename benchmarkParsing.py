@@ -0,0 +1,199 @@
+import season_data
+import fixture_corpus
+import page_cache
+import parser_backend
+from instrumentation import Instrumentation
+from seasons import seasons, cacheDirectory
+from table_locator import rowPattern
+
+import argparse
+import json
+import os
+import sys
+import zipfile
+
+
+# BENCHMARK SETTINGS
+### The baseline holds the throughput of each stage from an earlier run. A stage whose throughput drops more than tolerance below its baseline counts as a regression
+baselinePath = 'benchmarkBaseline.json'
+tolerance = 0.2
+
+# The stages that are timed, in the order makeFinalTables runs them, along with the index attribute of the table each one reads. finishEpisodeTable reads no table,
+#	so the rows of the episodes it finishes are counted instead
+stages = [
+	('processEpisodeTable', 'episodeIndex')
+	,('processSeasonSummaryTable', 'seasonSumIndex')
+	,('processVotingHistory', 'voteHistIndex')
+	,('processContestantsTable', 'conIndex')
+	,('addJurytoContestants', 'juryIndex')
+	,('finishEpisodeTable', None)
+]
+
+
+def loadPages(corpus = None, cache = None):
+	""" Reads the saved page of every season that has one
+
+		Args:
+			corpus: A string holding the path of a fixture corpus to read the pages from, or None to read them from the page cache
+			cache: A string holding the path of the page cache, used when corpus is None
+
+		Returns:
+			A list of tuples, each holding an entry of seasons and the HTML of its page, for the seasons whose page was found
+	"""
+	pages = []
+
+	if corpus is not None:
+		with zipfile.ZipFile(corpus) as corpusFile:
+			names = set(corpusFile.namelist())
+			for season in seasons:
+				name = fixture_corpus.entryName(season[2])
+				if name in names:
+					pages.append((season, corpusFile.read(name).decode('utf-8')))
+				else:
+					print('Season', season[0], 'skipped, its page is not in the corpus')
+
+	else:
+		with page_cache.PageCache(cache, offline = True) as offlineCache:
+			for season in seasons:
+				try:
+					pages.append((season, offlineCache.get(season[2])))
+				except LookupError:
+					print('Season', season[0], 'skipped, its page has not been saved')
+
+	return pages
+
+
+def benchmarkSeason(season, html, parser, repeats):
+	""" Times each stage of building one season's tables
+
+		The season is built from scratch repeats times, and the fastest time of each stage is kept, since slower runs only add noise from the rest of the machine. Each
+			stage's time includes parsing the tables it is the first to use
+
+		Args:
+			season: A list holding one entry of seasons
+			html: A string holding the HTML of the season's Wikipedia page
+			parser: A string indicating the Beautiful Soup parser to use
+			repeats: An integer indicating how many times to build the season
+
+		Returns:
+			A dictionary holding each stage name, and 'total' for all of makeFinalTables, as keys and the fastest seconds as values
+			A dictionary holding each stage name as keys and the number of table rows it processed as values
+	"""
+	best = {}
+	rows = {}
+
+	for i in range(repeats):
+		instrumentation = Instrumentation()
+
+		with instrumentation.stage(season[0], 'total'):
+			temp = season_data.SeasonData(season[0], season[1], season[2], season[3], season[4], season[5], season[6], season[7], season[8], season[9], html = html, parser = parser, instrumentation = instrumentation)
+
+			if i == 0:	# The rows of each table are counted from the raw HTML before the tables are released
+				for name, indexAttribute in stages:
+					if indexAttribute is not None:
+						start, end = temp.tables.positions[getattr(temp, indexAttribute)]
+						rows[name] = len(rowPattern.findall(html, start, end))
+
+			currContestants, currEpisodes = temp.makeFinalTables(upload = False)
+
+		rows['finishEpisodeTable'] = len(currEpisodes.index)
+
+		for name in [name for name, indexAttribute in stages] + ['total']:
+			seconds = instrumentation.stages[(season[0], name)][1]
+			best[name] = min(best.get(name, seconds), seconds)
+
+	return best, rows
+
+
+def summarize(results):
+	""" Combines the timings of every season into the throughput of each stage
+
+		Args:
+			results: A list of tuples, each holding the seconds and rows returned by benchmarkSeason for one season
+
+		Returns:
+			A dictionary holding each stage name, and 'total', as keys and dictionaries holding its total seconds, rows per second and seasons per second as values
+	"""
+	summary = {}
+
+	for name in [name for name, indexAttribute in stages] + ['total']:
+		seconds = sum(best[name] for best, rows in results)
+		numRows = sum(rows.get(name, 0) for best, rows in results) if name != 'total' else sum(sum(rows.values()) for best, rows in results)
+
+		summary[name] = {'seconds': round(seconds, 6), 'rowsPerSecond': round(numRows / seconds, 2), 'seasonsPerSecond': round(len(results) / seconds, 3)}
+
+	return summary
+
+
+def compareToBaseline(summary, baseline, tolerance):
+	""" Finds the stages that have slowed down since the baseline
+
+		Args:
+			summary: A dictionary of stage throughputs, as returned by summarize
+			baseline: A dictionary of stage throughputs from an earlier run, in the same format
+			tolerance: A float indicating the fraction the throughput may drop before it counts as a regression
+
+		Returns:
+			A list of strings describing each regression, which is empty if every stage is within tolerance
+	"""
+	regressions = []
+
+	for name, current in summary.items():
+		if name not in baseline:
+			continue
+
+		for measure in ['rowsPerSecond', 'seasonsPerSecond']:
+			if current[measure] < baseline[name][measure] * (1 - tolerance):
+				regressions.append(name + ' ' + measure + ' fell from ' + str(baseline[name][measure]) + ' to ' + str(current[measure]))
+
+	return regressions
+
+
+if __name__ == '__main__':
+	argParser = argparse.ArgumentParser(description = 'Time each SeasonData stage on the saved season pages and compare with a stored baseline')
+	argParser.add_argument('--corpus', help = 'fixture corpus to read the pages from, instead of the page cache')
+	argParser.add_argument('--cache', default = cacheDirectory, help = 'page cache holding the saved season pages')
+	argParser.add_argument('--parser', default = parser_backend.defaultParser, choices = parser_backend.parsers, help = 'Beautiful Soup parser to benchmark')
+	argParser.add_argument('--repeats', type = int, default = 3, help = 'number of times each season is built, keeping the fastest')
+	argParser.add_argument('--baseline', default = baselinePath, help = 'file holding the baseline throughput')
+	argParser.add_argument('--tolerance', type = float, default = tolerance, help = 'fraction a stage\'s throughput may drop below the baseline before it fails')
+	argParser.add_argument('--save-baseline', action = 'store_true', help = 'store this run as the baseline for its parser instead of comparing with it')
+	args = argParser.parse_args()
+
+	pages = loadPages(args.corpus, args.cache)
+
+	if len(pages) == 0:
+		print('No saved season pages to benchmark')
+		sys.exit(1)
+
+	results = [benchmarkSeason(season, html, args.parser, args.repeats) for season, html in pages]
+	summary = summarize(results)
+
+	print('Benchmarked', len(results), 'seasons with', args.parser)
+	for name, measures in summary.items():
+		print(name.ljust(28), str(measures['seconds']).rjust(10), 's', str(measures['rowsPerSecond']).rjust(12), 'rows/s', str(measures['seasonsPerSecond']).rjust(10), 'seasons/s')
+
+	# Throughput depends on the parser, so the baseline is kept separately for each one
+	baselines = {}
+	if os.path.exists(args.baseline):
+		with open(args.baseline, encoding = 'utf-8') as baselineFile:
+			baselines = json.load(baselineFile)
+
+	if args.save_baseline:
+		baselines[args.parser] = summary
+		with open(args.baseline, 'w', encoding = 'utf-8') as baselineFile:
+			json.dump(baselines, baselineFile, indent = 1)
+		print('Saved the baseline for', args.parser, 'to', args.baseline)
+
+	elif args.parser not in baselines:
+		print('No baseline for', args.parser, 'in', args.baseline + ', run with --save-baseline to store one')
+
+	else:
+		regressions = compareToBaseline(summary, baselines[args.parser], args.tolerance)
+
+		if len(regressions) == 0:
+			print('Every stage is within', str(int(args.tolerance * 100)) + '% of the baseline')
+		else:
+			for regression in regressions:
+				print('Regression:', regression)
+			sys.exit(1)
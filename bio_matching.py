@@ -0,0 +1,277 @@
+import pandas as pd
+import numpy as np
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+import columnar_export
+import db_loader
+from bio_store import BioStore, storeDirectory
+from season_store import readJson, writeJson
+
+
+# MATCH SETTINGS
+### Bios whose best match scores below minConfidence are left unmatched. The match table is cached in the bio store's folder and rebuilt whenever the bios, the
+###	contestants or minConfidence change
+minConfidence = 0.35
+matchesName = 'matches.json'
+
+matchColumns = ['Season Number', 'Name', 'Bio Name', 'Bio Number', 'Confidence', 'Margin']
+
+letterPattern = re.compile(r'[^a-z0-9 ]+')
+spacePattern = re.compile(r' +')
+
+
+def nameKey(name):
+	""" Simplifies a name before it is compared, lower casing it and dropping accents and punctuation
+
+		Args:
+			name: A string holding a name
+
+		Returns:
+			A string holding the simplified name, such as 'jose ramirez' for José Ramirez
+	"""
+	name = letterPattern.sub('', unicodedata.normalize('NFKD', name).lower())
+
+	return spacePattern.sub(' ', name).strip()
+
+
+def trigrams(name):
+	""" Splits a simplified name into the overlapping three letter pieces it is compared by
+
+		The name is padded with a space on both sides, so the start and end of the name each make their own pieces and short names such as Kel still have some
+
+		Args:
+			name: A string holding a simplified name, as made by nameKey
+
+		Returns:
+			A list of strings holding the pieces
+	"""
+	padded = ' ' + name + ' '
+
+	return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def trigramMatrix(names, columns):
+	""" Numbers the pieces of each name, so names can be laid out as rows of piece counts
+
+		Args:
+			names: A list of strings holding simplified names
+			columns: A dictionary holding pieces as keys and column numbers as values, which pieces not yet in it are added to
+
+		Returns:
+			A list of lists, one per name, holding the column number of each of its pieces
+	"""
+	rows = []
+	for name in names:
+		rows.append([columns.setdefault(piece, len(columns)) for piece in trigrams(name)])
+
+	return rows
+
+
+def similarities(rows, otherRows, numColumns):
+	""" Scores every pair of names from two lists by the cosine similarity of their pieces
+
+		Args:
+			rows: A list of lists holding the column numbers of each name's pieces, as returned by trigramMatrix
+			otherRows: A list of lists in the same format for the other names
+			numColumns: An integer indicating the number of distinct pieces
+
+		Returns:
+			A numpy array with a row per name of rows and a column per name of otherRows holding their similarity, from 0 to 1
+	"""
+	matrices = []
+	for nameRows in [rows, otherRows]:
+		counts = np.zeros((len(nameRows), numColumns))
+		rowNumbers = np.repeat(np.arange(len(nameRows)), [len(row) for row in nameRows])
+		np.add.at(counts, (rowNumbers, np.concatenate(nameRows).astype(int) if len(nameRows) > 0 else np.array([], dtype = int)), 1)
+
+		lengths = np.linalg.norm(counts, axis = 1, keepdims = True)
+		matrices.append(counts / np.where(lengths == 0, 1, lengths))
+
+	return np.clip(matrices[0] @ matrices[1].T, 0, 1)
+
+
+def matchSeason(bioNames, contestants, minConfidence = minConfidence):
+	""" Matches the cast members of one season's bios to the season's contestants
+
+		Each contestant is compared by their full name, the name they were called on the show and their first name, since CBS only gives first names for the early
+			seasons, and the best of the three is their score. Pairs are then taken from the highest score down, skipping any bio or contestant already matched, so each
+			bio is matched to at most one contestant
+
+		Args:
+			bioNames: A list of strings holding the names on the season's bios, in the order they are stored
+			contestants: A DataFrame holding the Name and Called columns of the season's contestants
+			minConfidence: A float indicating the lowest score a match is kept at
+
+		Returns:
+			A list of tuples, one per match, holding the position of the bio in bioNames, the position of the contestant in contestants, the score of the match and its
+				margin over the bio's best other contestant, which is negative if that contestant was matched to another bio
+	"""
+	if len(bioNames) == 0 or len(contestants.index) == 0:
+		return []
+
+	fullNames = [nameKey(name) for name in contestants['Name'].fillna('')]
+	called = [nameKey(name) for name in contestants['Called'].fillna('')]
+	firstNames = [name.split(' ')[0] for name in fullNames]
+
+	columns = {}
+	bioRows = trigramMatrix([nameKey(name) for name in bioNames], columns)
+	keyRows = trigramMatrix(fullNames + called + firstNames, columns)
+
+	# The scores of the three names of each contestant are laid side by side, then the best of them kept
+	numContestants = len(fullNames)
+	scores = similarities(bioRows, keyRows, len(columns)).reshape(len(bioNames), 3, numContestants).max(axis = 1)
+
+	matches = []
+	bioTaken = set()
+	contestantTaken = set()
+
+	for flat in np.argsort(-scores, axis = None, kind = 'stable'):
+		bio, contestant = divmod(int(flat), numContestants)
+		score = scores[bio, contestant]
+
+		if score < minConfidence:
+			break
+		if bio in bioTaken or contestant in contestantTaken:
+			continue
+
+		bioTaken.add(bio)
+		contestantTaken.add(contestant)
+		others = np.delete(scores[bio], contestant)
+		matches.append((bio, contestant, float(score), float(score - others.max()) if len(others) > 0 else float(score)))
+
+		if len(bioTaken) == len(bioNames) or len(contestantTaken) == numContestants:
+			break
+
+	return matches
+
+
+def matchBios(contestants, bios, minConfidence = minConfidence):
+	""" Matches every bio to a contestant of the same season
+
+		Only names within the same season are compared, so the work grows with the size of each season rather than with the square of every cast member
+
+		Args:
+			contestants: A DataFrame holding the Name, Called and Season Number columns of the contestants, such as the allContestants table
+			bios: A DataFrame holding the Name and Season Number of each bio, as returned by BioStore.toFrame
+			minConfidence: A float indicating the lowest score a match is kept at
+
+		Returns:
+			A DataFrame with a row per match holding the season number, the contestant's name, the name on the bio, which bio of that name in the season it is (0
+				unless two cast members of a season share a name), and the score of the match along with its margin over the bio's best other contestant
+	"""
+	rows = []
+
+	contestantSeasons = dict(list(contestants.groupby('Season Number', sort = False)))
+
+	for seasonNum, seasonBios in bios.groupby('Season Number', sort = True):
+		if seasonNum not in contestantSeasons:
+			continue
+
+		seasonContestants = contestantSeasons[seasonNum]
+		bioNames = list(seasonBios['Name'])
+		bioNumbers = list(seasonBios.groupby('Name', sort = False).cumcount())
+
+		for bio, contestant, score, margin in matchSeason(bioNames, seasonContestants, minConfidence):
+			rows.append([int(seasonNum), seasonContestants['Name'].iloc[contestant], bioNames[bio], int(bioNumbers[bio]), round(score, 4), round(margin, 4)])
+
+	return pd.DataFrame(rows, columns = matchColumns)
+
+
+def inputVersion(contestants, bios, minConfidence):
+	""" Identifies the names a match table is built from, which changes whenever a contestant or bio is added, removed or renamed
+
+		Args:
+			contestants: A DataFrame holding the Name, Called and Season Number columns of the contestants
+			bios: A DataFrame holding the Name and Season Number of each bio
+			minConfidence: A float indicating the lowest score a match is kept at
+
+		Returns:
+			A string holding a SHA-256 hash of the names and minConfidence
+	"""
+	names = {'contestants': contestants[['Season Number', 'Name', 'Called']].astype(str).values.tolist(), 'bios': bios[['Season Number', 'Name']].astype(str).values.tolist(), 'minConfidence': minConfidence}
+
+	return hashlib.sha256(json.dumps(names).encode('utf-8')).hexdigest()
+
+
+def matchTable(contestants, bios, path = None, minConfidence = minConfidence):
+	""" Finds the match table of the bios and contestants, reading it from a cache when nothing has changed since it was last built
+
+		Args:
+			contestants: A DataFrame holding the Name, Called and Season Number columns of the contestants
+			bios: A DataFrame holding the Name and Season Number of each bio
+			path: A string holding the path of the file the table is cached in, or None to not cache it
+			minConfidence: A float indicating the lowest score a match is kept at
+
+		Returns:
+			A DataFrame of matches, as returned by matchBios
+	"""
+	source = inputVersion(contestants, bios, minConfidence)
+
+	if path is not None:
+		cached = readJson(path)
+		if cached.get('source') == source:
+			return pd.DataFrame(cached['matches'], columns = matchColumns)
+
+	matches = matchBios(contestants, bios, minConfidence)
+
+	if path is not None:
+		writeJson(path, {'source': source, 'matches': matches.values.tolist()})
+
+	return matches
+
+
+def joinBios(contestants, store, path = None, minConfidence = minConfidence):
+	""" Adds the bio of each contestant to the contestants
+
+		Args:
+			contestants: A DataFrame holding at least the Name, Called and Season Number columns of the contestants
+			store: A BioStore holding the bios
+			path: A string holding the path of the file the match table is cached in, or None to keep it in the store's folder
+			minConfidence: A float indicating the lowest score a match is kept at
+
+		Returns:
+			A DataFrame holding the contestants with Bio and Match Confidence columns added, which are empty for contestants no bio was matched to
+	"""
+	if path is None:
+		path = os.path.join(store.directory, matchesName)
+
+	bios = store.toFrame()
+	bios['Bio Number'] = bios.groupby(['Season Number', 'Name']).cumcount()
+
+	matches = matchTable(contestants, bios, path, minConfidence)
+
+	joined = contestants.merge(matches[['Season Number', 'Name', 'Bio Name', 'Bio Number', 'Confidence']], how = 'left', on = ['Season Number', 'Name'])
+	joined = joined.merge(bios.rename(columns = {'Name': 'Bio Name'}), how = 'left', on = ['Season Number', 'Bio Name', 'Bio Number'])
+
+	return joined.drop(columns = ['Bio Name', 'Bio Number']).rename(columns = {'Confidence': 'Match Confidence'})
+
+
+if __name__ == '__main__':
+	argParser = argparse.ArgumentParser(description = 'Match the bios in the bio store to the contestants scraped from Wikipedia')
+	argParser.add_argument('--data', help = 'folder written by seasons.py --export to read the contestants from, instead of the database')
+	argParser.add_argument('--store', default = storeDirectory, help = 'folder the bio store is kept in')
+	argParser.add_argument('--min-confidence', type = float, default = minConfidence, help = 'lowest score a match is kept at')
+	argParser.add_argument('--output', help = 'csv file to write the match table to')
+	args = argParser.parse_args()
+
+	if args.data is None:
+		contestants = pd.read_sql_table('allContestants', db_loader.getEngine(), schema = 'overall', columns = ['Name', 'Called', 'Season Number'])
+	else:
+		contestants = columnar_export.readTable(os.path.join(args.data, 'contestants'), columns = ['Name', 'Called', 'Season Number'], plain = True)
+
+	store = BioStore(args.store)
+	bios = store.toFrame()
+
+	matches = matchTable(contestants, bios, os.path.join(store.directory, matchesName), args.min_confidence)
+
+	print('Matched', len(matches.index), 'of', len(bios.index), 'bios to', len(contestants.index), 'contestants')
+	print(matches.sort_values('Confidence').head(10).to_string(index = False))
+
+	if args.output is not None:
+		matches.to_csv(args.output, index = False)
@@ -0,0 +1,308 @@
+import pandas as pd
+
+import argparse
+import bisect
+import gzip
+import json
+import math
+import os
+import re
+import unicodedata
+
+from bio_store import BioStore, storeDirectory
+
+
+# SEARCH SETTINGS
+### The index is kept in the bio store's folder and rebuilt whenever the store has changed since it was built. k1 and b are the usual BM25 settings: k1 controls how
+###	quickly repeats of a word stop adding to a bio's score and b how much longer bios are marked down
+indexName = 'searchIndex.json.gz'
+k1 = 1.2
+b = 0.75
+
+tokenPattern = re.compile(r'[a-z0-9]+')
+
+# A query is made of words, "quoted phrases" and prefixes ending in *
+queryPattern = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+	""" Splits text into the words that are indexed
+
+		Text is lower cased and accents are dropped, so José is found by searching jose. Anything other than letters and digits separates words
+
+		Args:
+			text: A string
+
+		Returns:
+			A list of strings holding the words, in order
+	"""
+	return tokenPattern.findall(unicodedata.normalize('NFKD', text).lower())
+
+
+class BioSearch():
+	""" An inverted index over the bios in a bio store, ranking matches with BM25
+
+		For every word, the index records each bio it appears in along with the positions it appears at, so phrases are found by checking that their words appear one
+			after another. The words are also kept sorted, so a prefix is expanded to every word starting with it by a binary search
+
+		Attributes:
+			docs: A list of [season number, name] lists, one per bio. Bios are referred to by their position in this list
+			lengths: A list of integers holding the number of words in each bio
+			averageLength: A float holding the average number of words in a bio
+			postings: A dictionary holding each word as keys and lists as values, holding a [bio, positions] list for each bio the word appears in, where positions is a
+				list of the positions of the word in that bio. They are kept as lists, as they are saved, so loading the index does not rebuild them
+			vocabulary: A sorted list of strings holding every word
+			source: A dictionary holding the season numbers, as strings, as keys and the offset, length and CRC-32 of the season's block in the bio store as values,
+				recording the version of the store the index was built from
+
+	"""
+
+	def __init__(self, docs, lengths, postings, source):
+		self.docs = docs
+		self.lengths = lengths
+		self.averageLength = sum(lengths) / len(lengths) if len(lengths) > 0 else 0.0
+		self.postings = postings
+		self.vocabulary = sorted(postings)
+		self.source = source
+
+	@classmethod
+	def build(cls, store):
+		""" Builds an index over every bio in a bio store
+
+			Args:
+				store: A BioStore
+
+			Returns:
+				A BioSearch
+		"""
+		docs = []
+		lengths = []
+		postings = {}
+
+		for seasonNum, name, bio in store.items():
+			doc = len(docs)
+			docs.append([seasonNum, name])
+
+			words = tokenize(bio)
+			lengths.append(len(words))
+
+			positions = {}
+			for position, word in enumerate(words):
+				positions.setdefault(word, []).append(position)
+
+			for word, wordPositions in positions.items():
+				postings.setdefault(word, []).append([doc, wordPositions])
+
+		return cls(docs, lengths, postings, storeVersion(store))
+
+	def save(self, path):
+		""" Writes the index to a gzip compressed JSON file
+
+			Args:
+				path: A string holding the path of the file
+		"""
+		contents = {'docs': self.docs, 'lengths': self.lengths, 'source': self.source, 'postings': self.postings}
+
+		with gzip.open(path + '.tmp', 'wt', compresslevel = 6, encoding = 'utf-8') as indexFile:
+			json.dump(contents, indexFile, separators = (',', ':'))
+
+		os.replace(path + '.tmp', path)
+
+	@classmethod
+	def load(cls, path):
+		""" Reads an index written by save
+
+			Args:
+				path: A string holding the path of the file
+
+			Returns:
+				A BioSearch
+		"""
+		with gzip.open(path, 'rt', encoding = 'utf-8') as indexFile:
+			contents = json.load(indexFile)
+
+		return cls(contents['docs'], contents['lengths'], contents['postings'], contents['source'])
+
+	def expand(self, prefix):
+		""" Finds every indexed word starting with a prefix
+
+			Args:
+				prefix: A string
+
+			Returns:
+				A list of strings holding the words
+		"""
+		start = bisect.bisect_left(self.vocabulary, prefix)
+		end = bisect.bisect_left(self.vocabulary, prefix + '\uffff')
+
+		return self.vocabulary[start:end]
+
+	def phraseMatches(self, words):
+		""" Finds the bios a phrase appears in
+
+			Args:
+				words: A list of strings holding the words of the phrase, in order
+
+			Returns:
+				A dictionary holding the position of each bio the phrase appears in as keys and the number of times it appears as values
+		"""
+		if any(word not in self.postings for word in words):
+			return {}
+
+		# The bios holding the rarest word are checked first, since the phrase can only be in those
+		rarest = min(range(len(words)), key = lambda i: len(self.postings[words[i]]))
+
+		others = {i: dict(self.postings[word]) for i, word in enumerate(words) if i != rarest}
+
+		matches = {}
+		for doc, positions in self.postings[words[rarest]]:
+			starts = {position - rarest for position in positions}
+
+			for i, wordDocs in others.items():
+				if len(starts) == 0:
+					break
+
+				wordPositions = wordDocs.get(doc)
+				if wordPositions is None:
+					starts = set()
+				else:
+					starts &= {position - i for position in wordPositions}
+
+			if len(starts) > 0:
+				matches[doc] = len(starts)
+
+		return matches
+
+	def termMatches(self, term):
+		""" Finds the bios a term of a query appears in
+
+			A prefix that follows other words, such as "jeff pro*", is a phrase whose last word is any word starting with the prefix, so the other words must come right
+				before it
+
+			Args:
+				term: A string holding a word, a phrase or a prefix ending in *, which may follow other words
+
+			Returns:
+				A dictionary holding the position of each bio the term appears in as keys and the number of times it appears as values
+		"""
+		if term.endswith('*'):
+			words = tokenize(term[:-1])
+
+			matches = {}
+			for word in (self.expand(words[-1]) if len(words) > 0 else []):
+				if len(words) == 1:
+					wordMatches = {doc: len(positions) for doc, positions in self.postings[word]}
+				else:
+					wordMatches = self.phraseMatches(words[:-1] + [word])
+
+				for doc, count in wordMatches.items():
+					matches[doc] = matches.get(doc, 0) + count
+			return matches
+
+		words = tokenize(term)
+
+		if len(words) == 1:
+			return {doc: len(positions) for doc, positions in self.postings.get(words[0], [])}
+
+		return self.phraseMatches(words)
+
+	def search(self, query, seasonNums = None, requireAll = True, limit = None):
+		""" Finds the bios matching a query, best first
+
+			Each word, "quoted phrase" or prefix* in the query is scored with BM25, treating a phrase or every word matching a prefix as a single term, and a bio's score
+				is the sum of its terms' scores
+
+			Args:
+				query: A string holding the query, such as 'lawyer', '"law school"' or 'attorn*'
+				seasonNums: A list of integers holding the numbers of the seasons to search, or None to search every season
+				requireAll: A boolean indicating if a bio must match every term of the query, rather than any of them
+				limit: An integer indicating the most results to return, or None to return them all
+
+			Returns:
+				A DataFrame with a row per matching bio holding the cast member's name, season number and score, sorted by score
+		"""
+		terms = [phrase if phrase != '' else word for phrase, word in queryPattern.findall(query)]
+		terms = [term for term in terms if len(tokenize(term)) > 0]
+
+		seasons = set(seasonNums) if seasonNums is not None else None
+
+		scores = {}
+		counts = {}
+		for term in terms:
+			matches = self.termMatches(term)
+			idf = math.log(1 + (len(self.docs) - len(matches) + 0.5) / (len(matches) + 0.5))
+
+			for doc, frequency in matches.items():
+				if seasons is not None and self.docs[doc][0] not in seasons:
+					continue
+
+				norm = k1 * (1 - b + b * self.lengths[doc] / self.averageLength)
+				scores[doc] = scores.get(doc, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+				counts[doc] = counts.get(doc, 0) + 1
+
+		if requireAll:
+			scores = {doc: score for doc, score in scores.items() if counts[doc] == len(terms)}
+
+		ranked = sorted(scores.items(), key = lambda item: -item[1])
+		if limit is not None:
+			ranked = ranked[:limit]
+
+		return pd.DataFrame([[self.docs[doc][1], self.docs[doc][0], score] for doc, score in ranked], columns = ['Name', 'Season Number', 'Score'])
+
+
+def storeVersion(store):
+	""" Identifies the version of a bio store, which changes whenever a season is added or stored again
+
+		A block's offset alone is not enough, since a store that is cleared and rebuilt writes its blocks from the start of the file again, so the length and CRC-32 of
+			each block are included too
+
+		Args:
+			store: A BioStore
+
+		Returns:
+			A dictionary holding the season numbers, as strings, as keys and lists holding the offset, length and CRC-32 of the season's block as values. The CRC-32
+				is None for blocks stored before it was recorded
+	"""
+	return {season: [entry['offset'], entry['length'], entry.get('crc')] for season, entry in store.index.items()}
+
+
+def openIndex(store, path = None):
+	""" Loads the search index of a bio store, building and saving it first if it is missing or the store has changed since it was built
+
+		Args:
+			store: A BioStore
+			path: A string holding the path of the index file, or None to keep it in the store's folder
+
+		Returns:
+			A BioSearch
+	"""
+	if path is None:
+		path = os.path.join(store.directory, indexName)
+
+	if os.path.exists(path):
+		search = BioSearch.load(path)
+		if search.source == storeVersion(store):
+			return search
+
+	search = BioSearch.build(store)
+	search.save(path)
+
+	return search
+
+
+if __name__ == '__main__':
+	argParser = argparse.ArgumentParser(description = 'Search the bios in the bio store')
+	argParser.add_argument('query', help = 'words, "quoted phrases" and prefixes ending in * to search for')
+	argParser.add_argument('--store', default = storeDirectory, help = 'folder the bio store is kept in')
+	argParser.add_argument('--seasons', type = int, nargs = '+', help = 'only search these seasons')
+	argParser.add_argument('--any', action = 'store_true', help = 'match bios holding any of the terms rather than all of them')
+	argParser.add_argument('--limit', type = int, default = 20, help = 'most results to show')
+	args = argParser.parse_args()
+
+	search = openIndex(BioStore(args.store))
+	results = search.search(args.query, args.seasons, requireAll = not args.any, limit = args.limit)
+
+	if len(results.index) == 0:
+		print('No bios match', args.query)
+	else:
+		print(results.to_string(index = False))
@@ -0,0 +1,250 @@
+from bs4 import BeautifulSoup
+
+import pandas as pd
+
+import argparse
+import os
+import re
+import zlib
+
+import parser_backend
+from season_store import readJson, writeJson
+
+
+# BIO STORE SETTINGS
+### The store is a folder holding the cleaned bios of every cast member in one compressed file, with an index recording where each one is. The bios of a season are
+###	compressed together as one block, since bios of the same season share most of their wording
+storeDirectory = 'bioStore'
+
+dataName = 'bios.bin'
+indexName = 'index.json'
+
+whitespacePattern = re.compile(r'\s+')
+
+
+def cleanBio(bio, parser = parser_backend.defaultParser):
+	""" Turns the HTML of a bio into plain text
+
+		Line breaks, paragraphs and list items each start a new line, runs of spaces are collapsed and empty lines are left out, so a label such as
+			'<strong>Occupation</strong>: Musician' becomes the line 'Occupation: Musician'
+
+		Args:
+			bio: A string or Beautiful Soup object holding the HTML of the bio, or of one person's half of a shared bio
+			parser: A string indicating the Beautiful Soup parser to use
+
+		Returns:
+			A string holding the text of the bio
+	"""
+	soup = BeautifulSoup(str(bio), parser)
+
+	for lineBreak in soup.find_all('br'):
+		lineBreak.replace_with('\n')
+	for block in soup.find_all(['p', 'li', 'div']):
+		block.append('\n')
+
+	lines = [whitespacePattern.sub(' ', line).strip() for line in soup.get_text().split('\n')]
+
+	return '\n'.join(line for line in lines if line != '')
+
+
+class BioStore():
+	""" Keeps the cleaned bio of every cast member, compressed and indexed by season and name
+
+		The bios of each season are stored as one zlib compressed block at the end of the data file. The index records where each season's block starts and how long it
+			is, along with the name of every cast member in it and where their bio sits inside the block once it is decompressed. A lookup reads the index, seeks straight
+			to the season's block and decompresses only that block, so the rest of the file is never read. The block last decompressed is kept, so looking up several
+			cast members of one season only decompresses it once
+
+		A season's block is written and flushed to disk before the index is updated to point to it, so a run that stops part way keeps every season it finished.
+			Storing a season again writes a new block and points the index to it, leaving the old one unused until the store is cleared
+
+		Attributes:
+			directory: A string holding the path of the folder the store is kept in
+			dataPath: A string holding the path of the file holding the compressed bios
+			indexPath: A string holding the path of the index file
+			index: A dictionary holding season numbers, as strings, as keys and dictionaries holding the offset, length and CRC-32 of the season's block and a list
+				of [name, start, end] lists, one per cast member in the order they were stored, as values
+			names: A dictionary holding (season number, name) tuples as keys and lists of (start, end) tuples as values, since two cast members of a season can
+				share a name
+			block: A tuple holding the number of the season last decompressed and its decompressed block, or None
+
+	"""
+
+	def __init__(self, directory = storeDirectory):
+		self.directory = directory
+		self.dataPath = os.path.join(directory, dataName)
+		self.indexPath = os.path.join(directory, indexName)
+
+		os.makedirs(directory, exist_ok = True)
+
+		self.index = readJson(self.indexPath)
+		self.names = {}
+		for season, entry in self.index.items():
+			self.addNames(int(season), entry['records'])
+
+		self.block = None
+
+	def addNames(self, seasonNum, records):
+		for name, start, end in records:
+			self.names.setdefault((seasonNum, name), []).append((start, end))
+
+	def seasons(self):
+		""" Lists the seasons in the store
+
+			Returns:
+				A sorted list of integers holding the season numbers
+		"""
+		return sorted(int(season) for season in self.index)
+
+	def addSeason(self, seasonNum, bios):
+		""" Stores the bios of a season, replacing any already stored for it
+
+			Args:
+				seasonNum: An integer indicating the season's number
+				bios: A list of tuples, each holding a cast member's name and the text of their bio
+		"""
+		records = []
+		block = bytearray()
+		for name, bio in bios:
+			text = bio.encode('utf-8')
+			records.append([name, len(block), len(block) + len(text)])
+			block += text
+
+		compressed = zlib.compress(bytes(block), 9)
+
+		with open(self.dataPath, 'ab') as dataFile:
+			offset = dataFile.tell()
+			dataFile.write(compressed)
+			dataFile.flush()
+			os.fsync(dataFile.fileno())
+
+		for name, start, end in self.index.get(str(seasonNum), {}).get('records', []):
+			self.names.pop((seasonNum, name), None)
+
+		self.index[str(seasonNum)] = {'offset': offset, 'length': len(compressed), 'crc': zlib.crc32(compressed), 'records': records}
+		self.addNames(seasonNum, records)
+		writeJson(self.indexPath, self.index)
+
+		if self.block is not None and self.block[0] == seasonNum:
+			self.block = None
+
+	def readBlock(self, seasonNum):
+		""" Reads and decompresses the block of a season
+
+			Args:
+				seasonNum: An integer indicating the season's number
+
+			Returns:
+				A bytes object holding the season's bios, one after another
+		"""
+		if self.block is not None and self.block[0] == seasonNum:
+			return self.block[1]
+
+		entry = self.index[str(seasonNum)]
+
+		with open(self.dataPath, 'rb') as dataFile:
+			dataFile.seek(entry['offset'])
+			block = zlib.decompress(dataFile.read(entry['length']))
+
+		self.block = (seasonNum, block)
+
+		return block
+
+	def get(self, seasonNum, name):
+		""" Looks up the bio of a cast member
+
+			Args:
+				seasonNum: An integer indicating the season's number
+				name: A string holding the cast member's name, as it appears on their season's cast page
+
+			Returns:
+				A list of strings holding the bio of every cast member of the season with that name, which is empty if there are none
+		"""
+		locations = self.names.get((seasonNum, name), [])
+		if len(locations) == 0:
+			return []
+
+		block = self.readBlock(seasonNum)
+
+		return [block[start:end].decode('utf-8') for start, end in locations]
+
+	def items(self, seasonNums = None):
+		""" Reads every bio in the store, one season at a time
+
+			Args:
+				seasonNums: A list of integers holding the numbers of the seasons to read, or None to read every season
+
+			Yields:
+				Tuples, each holding a season number, a cast member's name and the text of their bio, in the order they were stored
+		"""
+		for seasonNum in (self.seasons() if seasonNums is None else seasonNums):
+			if str(seasonNum) not in self.index:
+				continue
+
+			block = self.readBlock(seasonNum)
+			for name, start, end in self.index[str(seasonNum)]['records']:
+				yield seasonNum, name, block[start:end].decode('utf-8')
+
+	def toFrame(self, seasonNums = None):
+		""" Reads the bios of the store into a DataFrame
+
+			Args:
+				seasonNums: A list of integers holding the numbers of the seasons to read, or None to read every season
+
+			Returns:
+				A DataFrame with a row per cast member holding their name, season number and bio
+		"""
+		return pd.DataFrame(list(self.items(seasonNums)), columns = ['Season Number', 'Name', 'Bio'])[['Name', 'Season Number', 'Bio']]
+
+	def clear(self):
+		""" Removes every season from the store
+		"""
+		if os.path.exists(self.dataPath):
+			os.remove(self.dataPath)
+
+		self.index = {}
+		self.names = {}
+		self.block = None
+		writeJson(self.indexPath, self.index)
+
+
+def convertCsv(path, store):
+	""" Adds the bios of a file written by earlier versions of wholeCastScrape.py, which hold the HTML of each bio, to a store
+
+		Args:
+			path: A string holding the path of the file, with Name, Season Number and Link to Bio columns
+			store: A BioStore
+
+		Returns:
+			An integer indicating the number of bios stored
+	"""
+	bios = pd.read_csv(path)
+
+	for seasonNum, seasonBios in bios.groupby('Season Number', sort = False):
+		store.addSeason(int(seasonNum), [(name, cleanBio(bio)) for name, bio in zip(seasonBios['Name'], seasonBios['Link to Bio'].fillna(''))])
+
+	return len(bios.index)
+
+
+if __name__ == '__main__':
+	argParser = argparse.ArgumentParser(description = 'Build the bio store from a nameSeasonBio.csv file, or print the bio of a cast member')
+	argParser.add_argument('command', choices = ['convert', 'show'])
+	argParser.add_argument('arguments', nargs = '*', help = 'the csv file to convert, or the season number and name of the cast member to show')
+	argParser.add_argument('--store', default = storeDirectory, help = 'folder the bio store is kept in')
+	args = argParser.parse_intermixed_args()
+
+	store = BioStore(args.store)
+
+	if args.command == 'convert':
+		path = args.arguments[0] if len(args.arguments) > 0 else 'nameSeasonBio.csv'
+		print('Stored ' + str(convertCsv(path, store)) + ' bios from ' + path + ' in ' + args.store)
+
+	else:
+		bios = store.get(int(args.arguments[0]), ' '.join(args.arguments[1:]))
+
+		if len(bios) == 0:
+			print('No bio stored for', ' '.join(args.arguments[1:]), 'in season', args.arguments[0])
+
+		for bio in bios:
+			print(bio)
+			print()
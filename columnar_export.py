@@ -0,0 +1,203 @@
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pandas as pd
+import numpy as np
+
+import json
+import os
+
+from db_loader import arrayColumns, holdsLists
+
+
+# The column every dataset is partitioned on. Each season is written to its own folder, named like 'Season Number=12', so readers can skip the seasons they do not need
+partitionColumn = 'Season Number'
+
+# Columns holding a small set of repeated values, which are stored with dictionary encoding and read back as pandas categoricals
+categoricalColumns = ['Tribe', 'Eliminated', 'Eliminated Player', 'Reward Winner', 'Immunity Winner', 'Tribe to Council', 'Voted For Final Tribal', 'Num Times Played Before', 'Winner']
+
+tableNames = ['seasons', 'contestants', 'episodes']
+
+# The key, in each file's schema metadata, holding the order of the columns of the DataFrame it was written from. Partitioning moves Season Number out of the files,
+#	so without it the column would be read back last
+orderKey = b'survivor.columns'
+
+# The key, in each file's schema metadata, holding the columns that mix numbers with strings, such as Num Times Played Before holding 1 and 'N/A'. Every value of
+#	these columns is stored as a string, so their numbers are turned back into numbers when they are read
+numbersKey = b'survivor.numbers'
+
+
+def columnType(column, values):
+	""" Chooses the Arrow type a DataFrame column is stored as
+
+		Args:
+			column: A string holding the name of the column
+			values: A Series holding the values of the column
+
+		Returns:
+			An Arrow DataType, or None to let Arrow infer the type
+	"""
+	if column in arrayColumns and holdsLists(values):	# Day holds lists in the contestants table but strings in the episodes table
+		return pa.list_(pa.string())
+	elif column in categoricalColumns:
+		return pa.dictionary(pa.int32(), pa.string())
+	elif values.dtype == object and pd.api.types.infer_dtype(values, skipna = True) in ['mixed', 'mixed-integer', 'mixed-integer-float']:
+		return pa.string()	# Columns mixing types, such as 1 and 'N/A', are stored as strings
+	else:
+		return None
+
+
+def holdsNumbers(values):
+	""" Determines if a column holds numbers that are stored as strings
+
+		Args:
+			values: A Series holding the values of a column that is stored as strings
+
+		Returns:
+			A boolean indicating if any value is a number other than NaN
+	"""
+	return any(isinstance(x, (int, float, np.integer, np.floating)) and not isinstance(x, (bool, np.bool_)) and x == x for x in values)
+
+
+def toNumber(x):
+	""" Turns a string written from a number back into that number
+
+		Args:
+			x: A value read from a column that mixes numbers with strings
+
+		Returns:
+			An integer or float if x is a string holding one, and otherwise x as it is
+	"""
+	if not isinstance(x, str):
+		return x
+
+	for number in [int, float]:
+		try:
+			return number(x)
+		except ValueError:
+			pass
+
+	return x
+
+
+def toArrow(frame):
+	""" Converts a DataFrame to an Arrow table with native list and dictionary columns
+
+		Args:
+			frame: A DataFrame holding one of the season, contestants or episodes tables
+
+		Returns:
+			An Arrow Table holding the same data
+	"""
+	arrays = []
+	numbers = []
+
+	for column in frame.columns:
+		values = frame[column]
+		arrowType = columnType(column, values)
+
+		if arrowType is not None and not pa.types.is_list(arrowType) and values.dtype == object and holdsNumbers(values):
+			numbers.append(str(column))
+
+		if arrowType is None:
+			arrays.append(pa.array(values, from_pandas = True))
+		elif pa.types.is_list(arrowType):
+			arrays.append(pa.array([None if x is None else [str(item) for item in x] for x in values], type = arrowType))
+		elif pa.types.is_dictionary(arrowType):
+			arrays.append(pa.array(values.map(lambda x: x if x is None or x != x else str(x)), type = pa.string(), from_pandas = True).dictionary_encode())
+		else:
+			arrays.append(pa.array(values.map(lambda x: x if x is None or x != x else str(x)), type = arrowType, from_pandas = True))
+
+	names = [str(column) for column in frame.columns]
+
+	return pa.Table.from_arrays(arrays, names = names).replace_schema_metadata({orderKey: json.dumps(names), numbersKey: json.dumps(numbers)})
+
+
+def writeTable(frame, directory):
+	""" Writes a table to a Parquet dataset partitioned by season
+
+		Every season present in the DataFrame replaces whatever was stored for that season before, while other seasons already in the dataset are kept
+
+		Args:
+			frame: A DataFrame holding one of the season, contestants or episodes tables, with a Season Number column
+			directory: A string holding the path of the folder the dataset is written to
+	"""
+	pq.write_to_dataset(toArrow(frame.reset_index(drop = True)), directory, partition_cols = [partitionColumn], existing_data_behavior = 'delete_matching', basename_template = 'part-{i}.parquet')
+
+
+def exportTables(seasons, contestants, episodes, directory):
+	""" Writes the season, contestants and episodes tables as Parquet datasets
+
+		Args:
+			seasons: A DataFrame holding the season table
+			contestants: A DataFrame holding the contestants of every season
+			episodes: A DataFrame holding the episodes of every season
+			directory: A string holding the path of the folder that will hold one dataset per table
+	"""
+	for tableName, frame in zip(tableNames, [seasons, contestants, episodes]):
+		writeTable(frame, os.path.join(directory, tableName))
+
+
+def readTable(directory, columns = None, seasons = None, plain = False):
+	""" Reads a table from a Parquet dataset, loading only the columns and seasons asked for
+
+		Seasons can have different columns, for example the episodes table has one column per voter, so the schemas of every season's file are combined first. Only the
+			file footers are read to do this. Numbers in columns that mix them with strings are turned back into numbers, so the values match the DataFrame written
+
+		Args:
+			directory: A string holding the path of the dataset
+			columns: A list of strings holding the columns to read, or None to read all of them
+			seasons: A list of integers holding the season numbers to read, or None to read every season
+			plain: A boolean indicating if list columns should be read back as lists and dictionary columns as strings, the way SeasonData makes them
+
+		Returns:
+			A DataFrame holding the table, with list columns as arrays and dictionary columns as categoricals unless plain is True
+	"""
+	partitioning = ds.partitioning(pa.schema([(partitionColumn, pa.int64())]), flavor = 'hive')
+	dataset = ds.dataset(directory, format = 'parquet', partitioning = partitioning)
+
+	fragments = sorted(dataset.get_fragments(), key = lambda fragment: ds.get_partition_keys(fragment.partition_expression).get(partitionColumn, 0))
+	schemas = [fragment.physical_schema for fragment in fragments]
+	schema = pa.unify_schemas(schemas + [pa.schema([(partitionColumn, pa.int64())])])
+
+	# The columns are put back in the order they were written in, taking each season in turn the way the seasons' tables are combined
+	order = []
+	numbers = set()
+	for fragmentSchema in schemas:
+		metadata = fragmentSchema.metadata if fragmentSchema.metadata is not None else {}
+		if orderKey in metadata:
+			order += [column for column in json.loads(metadata[orderKey]) if column not in order]
+		if numbersKey in metadata:
+			numbers.update(json.loads(metadata[numbersKey]))
+
+	dataset = ds.dataset(directory, format = 'parquet', partitioning = partitioning, schema = schema)
+
+	rowFilter = None
+	if seasons is not None:
+		rowFilter = ds.field(partitionColumn).isin(list(seasons))
+
+	frame = dataset.to_table(columns = columns, filter = rowFilter).to_pandas()
+
+	if partitionColumn in frame.columns:	# Folders are not listed in season order, so the rows are put back in season order, keeping their order within each season
+		frame = frame.sort_values(partitionColumn, kind = 'stable').reset_index(drop = True)
+
+	if columns is None and len(order) > 0:
+		frame = frame[[column for column in order if column in frame.columns] + [column for column in frame.columns if column not in order]]
+
+	for column in numbers:
+		if column not in frame.columns:
+			continue
+
+		if isinstance(frame[column].dtype, pd.CategoricalDtype):
+			frame[column] = frame[column].cat.rename_categories([toNumber(x) for x in frame[column].cat.categories])
+		else:
+			frame[column] = frame[column].map(toNumber)
+
+	if plain:
+		for column in frame.columns:
+			if isinstance(frame[column].dtype, pd.CategoricalDtype):
+				frame[column] = frame[column].astype(object).where(frame[column].notna(), None)
+			elif frame[column].dtype == object and frame[column].map(lambda x: isinstance(x, np.ndarray)).any():
+				frame[column] = frame[column].map(lambda x: list(x) if isinstance(x, np.ndarray) else x)
+
+	return frame
@@ -0,0 +1,124 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import page_cache
+
+
+# Responses worth trying again, since the server may answer once it is less busy
+retryStatuses = [429, 500, 502, 503, 504]
+
+
+class Crawler():
+	""" Downloads many pages at once over a shared pool of connections
+
+		Every request goes through one requests Session whose connection pool is large enough for every worker, so connections are kept alive and reused rather than
+			opened for each page. The number of requests made to any one host at a time is capped, failed requests are retried with exponential backoff, and a url
+			asked for more than once is only downloaded once
+
+		Attributes:
+			maxWorkers: An integer indicating the number of pages downloaded at once across every host
+			hostLimit: An integer indicating the number of pages downloaded at once from a single host
+			retries: An integer indicating the number of times a failed request is tried again
+			backoff: A float indicating the seconds to wait before the first retry, which doubles with each retry after it
+			session: A requests Session shared by every request
+			hostSlots: A dictionary holding host names as keys and Semaphores limiting the requests to that host as values
+			lock: A Lock held while adding to hostSlots
+
+	"""
+
+	def __init__(self, maxWorkers = 16, hostLimit = 8, retries = 4, backoff = 0.5):
+		self.maxWorkers = maxWorkers
+		self.hostLimit = hostLimit
+		self.retries = retries
+		self.backoff = backoff
+
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections = maxWorkers, pool_maxsize = maxWorkers)
+		self.session.mount('http://', adapter)
+		self.session.mount('https://', adapter)
+
+		self.hostSlots = {}
+		self.lock = threading.Lock()
+
+	def hostSlot(self, url):
+		""" Finds the Semaphore limiting the requests to a url's host
+
+			Args:
+				url: A string holding a url
+
+			Returns:
+				A Semaphore shared by every request to the host
+		"""
+		host = urlparse(url).netloc
+
+		with self.lock:
+			if host not in self.hostSlots:
+				self.hostSlots[host] = threading.BoundedSemaphore(self.hostLimit)
+
+			return self.hostSlots[host]
+
+	def get(self, url):
+		""" Downloads one page, retrying when the request fails or the server is busy
+
+			A Retry-After header sent by the server is waited out when it is longer than the backoff
+
+			Args:
+				url: A string holding the url of the page
+
+			Returns:
+				A string holding the text of the page
+
+			Raises:
+				requests.RequestException: The page could not be downloaded after every retry
+		"""
+		delay = self.backoff
+
+		for attempt in range(self.retries + 1):
+			try:
+				with self.hostSlot(url):
+					response = self.session.get(page_cache.mirrorUrl(url), timeout = 30)
+
+				if response.status_code not in retryStatuses or attempt == self.retries:
+					response.raise_for_status()
+					return response.text
+
+				wait = delay
+				retryAfter = response.headers.get('Retry-After', '')
+				if retryAfter.isdigit():
+					wait = max(wait, int(retryAfter))
+
+			except (requests.ConnectionError, requests.Timeout):
+				if attempt == self.retries:
+					raise
+				wait = delay
+
+			time.sleep(wait)
+			delay *= 2
+
+	def fetchAll(self, urls):
+		""" Downloads every page in a list at once, each unique url only once
+
+			Args:
+				urls: A list of strings holding the urls of the pages, which may hold repeats
+
+			Returns:
+				A dictionary holding each unique url as keys and the text of its page as values, or the exception raised if it could not be downloaded
+		"""
+		uniqueUrls = list(dict.fromkeys(urls))
+
+		with ThreadPoolExecutor(max_workers = self.maxWorkers) as pool:
+			futures = {url: pool.submit(self.get, url) for url in uniqueUrls}
+
+		pages = {}
+		for url, future in futures.items():
+			try:
+				pages[url] = future.result()
+			except requests.RequestException as ex:
+				pages[url] = ex
+
+		return pages
@@ -0,0 +1,344 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects.postgresql import ARRAY, TEXT
+
+import pandas as pd
+
+import io
+import json
+import os
+import queue
+import threading
+
+
+# DEFINE THE DATABASE CREDENTIALS
+### If you wish to use this program, update these to a Postgresql database that you have access to. To load into another database instead, such as a local SQLite
+###	file while testing, set the SURVIVOR_DATABASE_URL environment variable to its url
+user = 'USERNAME'
+password = 'PASSWORD'
+host = 'HOST'
+port = 'PORT'
+database = 'DATABASE NAME'
+
+databaseUrl = os.environ.get('SURVIVOR_DATABASE_URL', 'postgresql://' + user + ':' + password + '@' + host + ':' + port + '/' + database)
+
+# Columns that can hold lists of strings, which are stored as text arrays in Postgresql. Whether a column is an array is decided for each frame from its values, since
+#	'Day' holds lists in the contestants table but a single string such as 'Day 3' in the episodes table
+arrayColumns = ['Tribes', 'Voting Histories', 'Placement', 'Day']
+
+# The number of rows sent to the database by each COPY statement
+copyChunkSize = 10000
+
+# The number of uploads a BackgroundWriter holds before submitting another one waits
+writerQueueSize = 2
+
+sharedEngine = None
+engineLock = threading.Lock()
+
+
+def getEngine():
+	""" Returns the engine shared by the whole run
+
+		The engine is created the first time it is asked for. It keeps a pool of connections open, so every upload in the run reuses them instead of connecting again
+
+		Returns:
+			A SQLAlchemy Engine connected to databaseUrl
+	"""
+	global sharedEngine
+
+	with engineLock:
+		if sharedEngine is None:
+			if databaseUrl.startswith('postgresql'):
+				sharedEngine = create_engine(databaseUrl, pool_size = 5, max_overflow = 5, pool_pre_ping = True)
+			else:
+				sharedEngine = create_engine(databaseUrl)
+
+	return sharedEngine
+
+
+def holdsLists(values):
+	""" Determines if a column holds lists
+
+		Args:
+			values: A Series holding the values of the column
+
+		Returns:
+			A boolean indicating if every value that is not missing is a list or tuple, and there is at least one
+
+		Raises:
+			ValueError: The column mixes lists with other values, so it can be stored neither as an array nor as text
+	"""
+	isList = values.map(lambda x: isinstance(x, (list, tuple)))
+	present = isList | values.map(lambda x: not isinstance(x, (list, tuple)) and not pd.isna(x))
+
+	if present.any() and isList[present].all():
+		return True
+	elif isList.any():
+		raise ValueError('Column ' + str(values.name) + ' mixes lists with other values')
+
+	return False
+
+
+def listColumns(frame):
+	""" Finds the columns of a DataFrame that hold lists
+
+		Only the columns named in arrayColumns are checked, using holdsLists
+
+		Args:
+			frame: A DataFrame
+
+		Returns:
+			A list of strings holding the names of the list columns
+	"""
+	return [column for column in arrayColumns if column in frame.columns and holdsLists(frame[column])]
+
+
+def quoteCsv(text):
+	""" Quotes a string as a CSV field
+
+		Args:
+			text: A string
+
+		Returns:
+			A string holding text in double quotes, with any double quotes inside doubled
+	"""
+	return '"' + text.replace('"', '""') + '"'
+
+
+def arrayLiteral(values):
+	""" Writes a list of values as a Postgresql array literal
+
+		Args:
+			values: A list of values
+
+		Returns:
+			A string holding the array, such as {"Tagi","Rattana"}
+	"""
+	elements = []
+
+	for value in values:
+		if value is None:
+			elements.append('NULL')
+		else:
+			elements.append('"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"')
+
+	return '{' + ','.join(elements) + '}'
+
+
+def csvField(value):
+	""" Writes one value as a field of a Postgresql CSV COPY
+
+		Missing values are left unquoted and empty so they load as NULL, while every other value is quoted so empty strings stay empty strings
+
+		Args:
+			value: A value from a DataFrame
+
+		Returns:
+			A string holding the field
+	"""
+	if isinstance(value, (list, tuple)):
+		return quoteCsv(arrayLiteral(value))
+	elif pd.isna(value):
+		return ''
+	else:
+		return quoteCsv(str(value))
+
+
+def copyFrame(frame, table, schema, connection):
+	""" Streams the rows of a DataFrame into a Postgresql table with COPY FROM STDIN
+
+		The rows are written as CSV into a buffer copyChunkSize rows at a time, so only one chunk is held as text at once
+
+		Args:
+			frame: A DataFrame holding the rows to load
+			table: A string holding the name of the table, which must already exist
+			schema: A string holding the name of the schema the table is in
+			connection: A SQLAlchemy Connection to a Postgresql database
+	"""
+	columns = ', '.join('"' + column.replace('"', '""') + '"' for column in frame.columns)
+	statement = 'COPY "' + schema + '"."' + table + '" (' + columns + ') FROM STDIN WITH (FORMAT csv)'
+
+	cursor = connection.connection.cursor()
+
+	try:
+		rows = frame.itertuples(index = False, name = None)
+		finished = False
+
+		while not finished:
+			buffer = io.StringIO()
+			numRows = 0
+
+			for row in rows:
+				buffer.write(','.join(csvField(value) for value in row))
+				buffer.write('\n')
+				numRows += 1
+
+				if numRows == copyChunkSize:
+					break
+			else:
+				finished = True
+
+			if numRows > 0:
+				buffer.seek(0)
+				cursor.copy_expert(statement, buffer)
+	finally:
+		cursor.close()
+
+
+def loadFrame(frame, table, schema, engine = None, ifExists = 'replace'):
+	""" Loads a DataFrame into a database table
+
+		On Postgresql the table is created with the list columns as text arrays and the rows are loaded with COPY, all in one transaction. Other databases, such as a
+			SQLite stand-in used for testing, have no schemas or arrays, so the table is named schema_table and list columns are stored as JSON text
+
+		Args:
+			frame: A DataFrame holding the rows to load
+			table: A string holding the name of the table
+			schema: A string holding the name of the schema to put the table in
+			engine: A SQLAlchemy Engine or Connection, or None to use the shared engine
+			ifExists: A string, either 'replace' to recreate the table or 'append' to add to it
+	"""
+	if engine is None:
+		engine = getEngine()
+
+	if engine.dialect.name == 'postgresql':
+		dtype = {column: ARRAY(TEXT) for column in listColumns(frame)}
+
+		with engine.begin() as connection:
+			frame.head(0).to_sql(table, connection, schema = schema, if_exists = ifExists, index = False, dtype = dtype)
+			copyFrame(frame, table, schema, connection)
+
+	else:
+		frame = frame.copy()
+		for column in listColumns(frame):
+			frame[column] = frame[column].apply(lambda x: json.dumps(list(x)) if isinstance(x, (list, tuple)) else x)
+
+		frame.to_sql(schema + '_' + table, engine, if_exists = ifExists, index = False, chunksize = 500, method = 'multi')
+
+
+def replaceSeasons(frame, table, schema, seasonNums, engine = None):
+	""" Replaces the rows of some seasons in a database table, leaving the other seasons as they are
+
+		The rows of every season in seasonNums are deleted and the rows in frame appended, all in one transaction. Columns in frame that the table does not have yet, such
+			as a voter column from a new season, are added first. If the table does not exist yet, it is created from frame
+
+		Args:
+			frame: A DataFrame holding the rows of the seasons being replaced, with a Season Number column
+			table: A string holding the name of the table
+			schema: A string holding the name of the schema the table is in
+			seasonNums: A list of integers holding the season numbers being replaced
+			engine: A SQLAlchemy Engine, or None to use the shared engine
+	"""
+	if engine is None:
+		engine = getEngine()
+
+	if engine.dialect.name == 'postgresql':
+		tableName = '"' + schema + '"."' + table + '"'
+		inspectSchema = schema
+		inspectTable = table
+	else:
+		tableName = '"' + schema + '_' + table + '"'
+		inspectSchema = None
+		inspectTable = schema + '_' + table
+
+	inspector = inspect(engine)
+
+	if not inspector.has_table(inspectTable, schema = inspectSchema):
+		loadFrame(frame, table, schema, engine)
+		return
+
+	existingColumns = [column['name'] for column in inspector.get_columns(inspectTable, schema = inspectSchema)]
+
+	arrays = listColumns(frame)
+
+	with engine.begin() as connection:
+		for column in frame.columns:
+			if column not in existingColumns:
+				if column in arrays and engine.dialect.name == 'postgresql':
+					columnType = 'TEXT[]'
+				else:
+					columnType = 'TEXT'
+				connection.execute(text('ALTER TABLE ' + tableName + ' ADD COLUMN "' + column.replace('"', '""') + '" ' + columnType))
+
+		connection.execute(text('DELETE FROM ' + tableName + ' WHERE "Season Number" IN (' + ', '.join(str(int(seasonNum)) for seasonNum in seasonNums) + ')'))
+
+		if engine.dialect.name == 'postgresql':
+			copyFrame(frame, table, schema, connection)
+		else:
+			loadFrame(frame, table, schema, connection, ifExists = 'append')
+
+
+class BackgroundWriter():
+	""" Runs database uploads on a background thread while the caller carries on
+
+		Uploads are handed over through a bounded queue and run one at a time, in the order they were submitted. Once the queue is full, submitting waits for the writer
+			to catch up, so a slow database holds back the scraping rather than letting finished seasons pile up in memory. The first upload to fail stops the writer, and
+			its exception is raised by the next call to submit or close. Used as a context manager, every submitted upload is finished before the block exits
+
+		Attributes:
+			queue: A Queue holding the uploads waiting to run, as tuples of a function and its arguments
+			thread: The Thread running the uploads
+			error: The exception raised by the first failed upload, or None if none have failed
+
+	"""
+
+	def __init__(self, maxPending = writerQueueSize):
+		self.queue = queue.Queue(maxsize = maxPending)
+		self.error = None
+
+		self.thread = threading.Thread(target = self.run, name = 'BackgroundWriter', daemon = True)
+		self.thread.start()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, excTraceback):
+		if excType is None:
+			self.close()
+		else:	# The block is already failing, so finish the queued uploads without hiding its exception
+			self.queue.put(None)
+			self.thread.join()
+
+	def run(self):
+		""" Runs queued uploads until close is called
+
+			After an upload fails the remaining uploads are taken off the queue without being run, so the caller never waits on a full queue
+		"""
+		while True:
+			job = self.queue.get()
+
+			if job is None:
+				break
+
+			if self.error is None:
+				function, args = job
+				try:
+					function(*args)
+				except Exception as ex:
+					self.error = ex
+
+	def submit(self, function, *args):
+		""" Queues an upload, waiting while the queue is full
+
+			Args:
+				function: A function that uploads data, such as loadFrame
+				args: The arguments to call function with
+
+			Raises:
+				Exception: The exception of an earlier upload that failed
+		"""
+		if self.error is not None:
+			raise self.error
+
+		self.queue.put((function, args))
+
+	def close(self):
+		""" Waits for every queued upload to finish and stops the thread
+
+			Raises:
+				Exception: The exception of the first upload that failed
+		"""
+		self.queue.put(None)
+		self.thread.join()
+
+		if self.error is not None:
+			raise self.error
@@ -0,0 +1,203 @@
+from bs4 import BeautifulSoup
+import requests
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+import page_cache
+import parser_backend
+import wholeCastScrape
+
+
+# FIXTURE SETTINGS
+### The corpus is a zip file holding a snapshot of every page the scrapers read. Serve it with 'python fixture_corpus.py serve' and set the SURVIVOR_MIRROR
+###	environment variable to the address it prints to run seasons.py or wholeCastScrape.py against it instead of the live sites
+corpusPath = 'fixtureCorpus.zip'
+
+indexName = 'index.json'
+
+
+def entryName(url):
+	""" Finds the name a page is stored under in the corpus, which is also the path the stand-in server serves it from
+
+		Args:
+			url: A string holding the url of the page
+
+		Returns:
+			A string holding the host and path of the url, such as en.wikipedia.org/wiki/Survivor:_Borneo, with index.html added to paths ending in a slash
+	"""
+	parsed = urlparse(url)
+	name = parsed.netloc + unquote(parsed.path)
+
+	if name.endswith('/'):
+		name += 'index.html'
+	if parsed.query:
+		name += '?' + unquote(parsed.query)
+
+	return name
+
+
+def cbsPageUrls(session):
+	""" Finds every CBS page wholeCastScrape.py reads: the cast page, each season's cast page and each cast member's bio
+
+		Args:
+			session: A requests Session used to fetch the pages
+
+		Returns:
+			A list of strings holding the urls, without repeats, in the order wholeCastScrape.py reads them
+	"""
+	urls = [wholeCastScrape.url]
+
+	html = BeautifulSoup(session.get(wholeCastScrape.url).text, parser_backend.defaultParser)
+	numSeasons = len(html.find('li', class_ = 'pv-h').find('ul').findAll('li'))
+
+	for season in range(1, numSeasons + 1):
+		seasonUrl = wholeCastScrape.url + 'season/' + str(season) + '/'
+		urls.append(seasonUrl)
+
+		seasonHtml = BeautifulSoup(session.get(seasonUrl).text, parser_backend.defaultParser)
+		for name, seasonNum, bioURL, half in wholeCastScrape.findCast(season, seasonHtml):
+			if bioURL not in urls:
+				urls.append(bioURL)
+
+	return urls
+
+
+def recordCorpus(path, urls, session = None):
+	""" Downloads pages and writes them to a compressed corpus
+
+		Each page is stored as its own compressed entry, named by entryName, alongside an index recording the url, content type and ETag of every entry. Pages that
+			cannot be downloaded are reported and left out
+
+		Args:
+			path: A string holding the path of the zip file to write
+			urls: A list of strings holding the urls of the pages to store
+			session: A requests Session used to fetch the pages, or None to make one
+
+		Returns:
+			An integer indicating the number of pages stored
+	"""
+	if session is None:
+		session = requests.Session()
+
+	index = {}
+
+	with zipfile.ZipFile(path, 'w', compression = zipfile.ZIP_LZMA) as corpus:
+		for url in urls:
+			try:
+				response = session.get(url)
+				response.raise_for_status()
+			except requests.RequestException as ex:
+				print('Could not record', url, ex)
+				continue
+
+			name = entryName(url)
+			corpus.writestr(name, response.content)
+			index[name] = {'url': url, 'contentType': response.headers.get('Content-Type', 'text/html; charset=utf-8'), 'etag': '"' + hashlib.sha256(response.content).hexdigest() + '"'}
+
+		corpus.writestr(indexName, json.dumps(index, indent = 1))
+
+	return len(index)
+
+
+class CorpusServer(ThreadingHTTPServer):
+	""" Serves the pages of a corpus over HTTP, standing in for Wikipedia and CBS
+
+		A page recorded from https://en.wikipedia.org/wiki/Survivor:_Borneo is served at /en.wikipedia.org/wiki/Survivor:_Borneo, which is where page_cache.mirrorUrl
+			sends requests once SURVIVOR_MIRROR is set. Every response waits latency seconds first, and requests are handled on their own threads so concurrent fetches
+			overlap as they would against the real sites. Each page carries an ETag, so the page cache's revalidation is exercised too
+
+		Attributes:
+			corpus: A ZipFile holding the pages
+			index: A dictionary holding each entry name as keys and dictionaries describing the page as values
+			latency: A float indicating the seconds to wait before each response
+			lock: A Lock held while reading from the zip file, which is not safe to read from several threads at once
+
+	"""
+
+	daemon_threads = True
+
+	def __init__(self, path, address = ('127.0.0.1', 8000), latency = 0.0):
+		self.corpus = zipfile.ZipFile(path)
+		self.index = json.loads(self.corpus.read(indexName))
+		self.latency = latency
+		self.lock = threading.Lock()
+
+		super().__init__(address, CorpusHandler)
+
+	def read(self, name):
+		""" Reads a page from the corpus
+
+			Args:
+				name: A string holding the entry name of the page
+
+			Returns:
+				A bytes object holding the page
+		"""
+		with self.lock:
+			return self.corpus.read(name)
+
+
+class CorpusHandler(BaseHTTPRequestHandler):
+	""" Answers one request to a CorpusServer
+	"""
+
+	def do_GET(self):
+		time.sleep(self.server.latency)
+
+		name = entryName('http://' + self.path.lstrip('/'))	# The path starts with the host of the recorded site, so it is read as that site's url
+		entry = self.server.index.get(name)
+
+		if entry is None:
+			self.send_error(404)
+			return
+
+		if self.headers.get('If-None-Match') == entry['etag']:
+			self.send_response(304)
+			self.send_header('ETag', entry['etag'])
+			self.end_headers()
+			return
+
+		body = self.server.read(name)
+
+		self.send_response(200)
+		self.send_header('Content-Type', entry['contentType'])
+		self.send_header('Content-Length', str(len(body)))
+		self.send_header('ETag', entry['etag'])
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):	# Every page would otherwise be logged to the terminal
+		pass
+
+
+if __name__ == '__main__':
+	argParser = argparse.ArgumentParser(description = 'Record the pages the scrapers read into a corpus, or serve a recorded corpus as a stand-in for Wikipedia and CBS')
+	argParser.add_argument('command', choices = ['record', 'serve'])
+	argParser.add_argument('--corpus', default = corpusPath, help = 'path of the corpus zip file')
+	argParser.add_argument('--no-cbs', action = 'store_true', help = 'only record the Wikipedia season pages')
+	argParser.add_argument('--host', default = '127.0.0.1', help = 'address to serve on')
+	argParser.add_argument('--port', type = int, default = 8000, help = 'port to serve on')
+	argParser.add_argument('--latency', type = float, default = 0.0, help = 'seconds to wait before answering each request')
+	args = argParser.parse_args()
+
+	if args.command == 'record':
+		from seasons import seasons
+
+		session = requests.Session()
+		urls = [season[2] for season in seasons]
+		if not args.no_cbs:
+			urls += cbsPageUrls(session)
+
+		print('Recorded ' + str(recordCorpus(args.corpus, urls, session)) + ' of ' + str(len(urls)) + ' pages to ' + args.corpus)
+
+	else:
+		server = CorpusServer(args.corpus, (args.host, args.port), args.latency)
+		print('Serving ' + str(len(server.index)) + ' pages. Set ' + page_cache.mirrorVariable + '=http://' + args.host + ':' + str(args.port) + ' to use them')
+		server.serve_forever()
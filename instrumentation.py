@@ -0,0 +1,290 @@
+import cProfile
+import csv
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class Instrumentation():
+	""" Measures where the time goes while scraping seasons
+
+		Records the wall clock and CPU time spent in each named stage of each season, along with counters such as the number of Beautiful Soup objects built or bytes
+			fetched. Stages can be nested, for example unmergeSpan runs inside processVotingHistory, and each stage's time includes the stages inside it. CPU time is
+			measured for the thread running the stage, so uploads on a background thread are not counted against the scraping. A disabled Instrumentation records
+			nothing, so the measuring calls can stay in place at no cost
+
+		With memory tracking on, tracemalloc also records the peak memory allocated while each stage runs, above what was allocated when it started, and the net memory
+			it left allocated when it finished. tracemalloc sees every thread in the process, so the clearest figures come from runs without background uploads
+
+		Attributes:
+			enabled: A boolean indicating if anything is recorded
+			profileDirectory: A string holding the path of the folder a cProfile dump of each season is written to, or None to not profile
+			memory: A boolean indicating if the memory allocated by each stage is tracked with tracemalloc
+			stages: A dictionary holding (season number, stage name) tuples as keys and lists holding the number of calls, wall seconds, CPU seconds, the largest peak
+				bytes of any call and the total net bytes as values
+			counters: A dictionary holding (season number, counter name) tuples as keys and the counts as values
+			lock: A Lock held while recording, so stages can be measured from more than one thread
+			local: A thread local object holding, for each thread, the stack of peaks seen by the memory tracked stages it is inside
+
+	"""
+
+	def __init__(self, enabled = True, profileDirectory = None, memory = False):
+		self.enabled = enabled
+		self.profileDirectory = profileDirectory
+		self.memory = memory
+		self.stages = {}
+		self.counters = {}
+		self.lock = threading.Lock()
+		self.local = threading.local()
+
+	def __getstate__(self):	# Locks cannot be pickled, so fresh ones are made when an Instrumentation is sent to a worker process
+		state = self.__dict__.copy()
+		del state['lock']
+		del state['local']
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.lock = threading.Lock()
+		self.local = threading.local()
+
+	def stage(self, seasonNum, name):
+		""" Measures the code run inside a with block as one call of a stage
+
+			Args:
+				seasonNum: An integer indicating the season's number, or None for work on every season
+				name: A string holding the name of the stage
+
+			Returns:
+				A context manager that records the stage when the block exits
+		"""
+		if not self.enabled:
+			return nullcontext()
+
+		return self.measure(seasonNum, name)
+
+	@contextmanager
+	def measure(self, seasonNum, name):
+		if self.memory:
+			memoryStart = self.startMemory()
+
+		wallStart = time.perf_counter()
+		cpuStart = time.thread_time()
+
+		try:
+			yield
+		finally:
+			wallSeconds = time.perf_counter() - wallStart
+			cpuSeconds = time.thread_time() - cpuStart
+
+			peakBytes = 0
+			netBytes = 0
+			if self.memory:
+				peakBytes, netBytes = self.stopMemory(memoryStart)
+
+			self.addTime(seasonNum, name, wallSeconds, cpuSeconds, peakBytes = peakBytes, netBytes = netBytes)
+
+	def startMemory(self):
+		""" Starts tracking the memory of a stage
+
+			tracemalloc keeps a single peak for the whole process, so before it is reset for the new stage, the peak so far is saved for the stage it is nested in
+
+			Returns:
+				An integer holding the bytes allocated when the stage started
+		"""
+		if not tracemalloc.is_tracing():
+			tracemalloc.start()
+
+		peaks = getattr(self.local, 'peaks', None)
+		if peaks is None:
+			peaks = self.local.peaks = []
+
+		current, peak = tracemalloc.get_traced_memory()
+		if len(peaks) > 0:
+			peaks[-1] = max(peaks[-1], peak)
+
+		tracemalloc.reset_peak()
+		peaks.append(current)
+
+		return current
+
+	def stopMemory(self, memoryStart):
+		""" Finishes tracking the memory of a stage
+
+			Args:
+				memoryStart: An integer holding the bytes allocated when the stage started, as returned by startMemory
+
+			Returns:
+				An integer holding the peak bytes allocated during the stage above memoryStart
+				An integer holding the bytes allocated when the stage finished minus memoryStart
+		"""
+		current, peak = tracemalloc.get_traced_memory()
+		peaks = self.local.peaks
+		peak = max(peaks.pop(), peak)
+
+		if len(peaks) > 0:	# Carries the peak out to the stage this one is nested in, then starts a fresh peak for the rest of that stage
+			peaks[-1] = max(peaks[-1], peak)
+			tracemalloc.reset_peak()
+
+		return peak - memoryStart, current - memoryStart
+
+	def addTime(self, seasonNum, name, wallSeconds, cpuSeconds, calls = 1, peakBytes = 0, netBytes = 0):
+		""" Adds time measured elsewhere to a stage
+
+			Args:
+				seasonNum: An integer indicating the season's number, or None for work on every season
+				name: A string holding the name of the stage
+				wallSeconds: A float holding the wall clock seconds to add
+				cpuSeconds: A float holding the CPU seconds to add
+				calls: An integer indicating the number of calls the time covers
+				peakBytes: An integer holding the peak bytes allocated by any of the calls
+				netBytes: An integer holding the bytes the calls left allocated
+		"""
+		if not self.enabled:
+			return
+
+		with self.lock:
+			totals = self.stages.setdefault((seasonNum, name), [0, 0.0, 0.0, 0, 0])
+			totals[0] += calls
+			totals[1] += wallSeconds
+			totals[2] += cpuSeconds
+			totals[3] = max(totals[3], peakBytes)
+			totals[4] += netBytes
+
+	def count(self, seasonNum, name, amount = 1):
+		""" Adds to a counter
+
+			Args:
+				seasonNum: An integer indicating the season's number, or None for work on every season
+				name: A string holding the name of the counter
+				amount: An integer to add to the counter
+		"""
+		if not self.enabled:
+			return
+
+		with self.lock:
+			self.counters[(seasonNum, name)] = self.counters.get((seasonNum, name), 0) + amount
+
+	def profile(self, seasonNum):
+		""" Profiles the code run inside a with block with cProfile, writing the results to season<seasonNum>.prof in profileDirectory
+
+			Args:
+				seasonNum: An integer indicating the season's number
+
+			Returns:
+				A context manager that writes the profile when the block exits, or does nothing if profileDirectory is None
+		"""
+		if not self.enabled or self.profileDirectory is None:
+			return nullcontext()
+
+		return self.runProfiler(seasonNum)
+
+	@contextmanager
+	def runProfiler(self, seasonNum):
+		os.makedirs(self.profileDirectory, exist_ok = True)
+		profiler = cProfile.Profile()
+		profiler.enable()
+
+		try:
+			yield
+		finally:
+			profiler.disable()
+			profiler.dump_stats(os.path.join(self.profileDirectory, 'season' + str(seasonNum) + '.prof'))
+
+	def merge(self, other):
+		""" Adds everything recorded by another Instrumentation, such as one sent to a worker process
+
+			Args:
+				other: An Instrumentation
+		"""
+		for (seasonNum, name), (calls, wallSeconds, cpuSeconds, peakBytes, netBytes) in other.stages.items():
+			self.addTime(seasonNum, name, wallSeconds, cpuSeconds, calls, peakBytes, netBytes)
+
+		for (seasonNum, name), amount in other.counters.items():
+			self.count(seasonNum, name, amount)
+
+	def report(self):
+		""" Lists everything recorded
+
+			Returns:
+				A list of dictionaries, one per stage and counter of each season, ordered by season, holding the season, the kind ('stage' or 'counter'), the name, the
+					count (calls for a stage), and for stages the wall and CPU seconds and, if memory is tracked, the peak and net bytes
+		"""
+		rows = []
+
+		with self.lock:
+			for (seasonNum, name), (calls, wallSeconds, cpuSeconds, peakBytes, netBytes) in self.stages.items():
+				rows.append({'season': seasonNum, 'kind': 'stage', 'name': name, 'count': calls, 'wallSeconds': round(wallSeconds, 6), 'cpuSeconds': round(cpuSeconds, 6)})
+				if self.memory:
+					rows[-1].update({'peakBytes': peakBytes, 'netBytes': netBytes})
+
+			for (seasonNum, name), amount in self.counters.items():
+				rows.append({'season': seasonNum, 'kind': 'counter', 'name': name, 'count': amount, 'wallSeconds': None, 'cpuSeconds': None})
+				if self.memory:
+					rows[-1].update({'peakBytes': None, 'netBytes': None})
+
+		# Work on every season, recorded under None, is listed last
+		return sorted(rows, key = lambda row: (row['season'] is None, row['season'] or 0))
+
+	def writeReport(self, path):
+		""" Writes the report to a file, as CSV if path ends in .csv and as JSON otherwise
+
+			Args:
+				path: A string holding the path of the file
+		"""
+		rows = self.report()
+
+		if path.lower().endswith('.csv'):
+			with open(path, 'w', newline = '', encoding = 'utf-8') as reportFile:
+				fieldnames = ['season', 'kind', 'name', 'count', 'wallSeconds', 'cpuSeconds']
+				if self.memory:
+					fieldnames += ['peakBytes', 'netBytes']
+
+				writer = csv.DictWriter(reportFile, fieldnames = fieldnames)
+				writer.writeheader()
+				writer.writerows(rows)
+		else:
+			with open(path, 'w', encoding = 'utf-8') as reportFile:
+				json.dump(rows, reportFile, indent = 1)
+
+
+def soupBytes(tag):
+	""" Estimates the memory held by a Beautiful Soup object and everything inside it
+
+		Args:
+			tag: A Beautiful Soup Tag
+
+		Returns:
+			An integer holding the summed sizes, in bytes, of every element, text node and attribute in the tree
+	"""
+	total = sys.getsizeof(tag) + sys.getsizeof(tag.__dict__) + sys.getsizeof(tag.attrs)
+
+	for node in tag.descendants:
+		total += sys.getsizeof(node)
+
+		if hasattr(node, 'attrs'):
+			total += sys.getsizeof(node.__dict__) + sys.getsizeof(node.attrs)
+			for key, value in node.attrs.items():
+				total += sys.getsizeof(key) + sys.getsizeof(value)
+
+	return total
+
+
+def frameBytes(frame):
+	""" Finds the memory held by a DataFrame, including the strings and lists in its object columns
+
+		Args:
+			frame: A DataFrame
+
+		Returns:
+			An integer holding the size of the DataFrame in bytes
+	"""
+	return int(frame.memory_usage(index = True, deep = True).sum())
+
+
+# Used wherever no Instrumentation is given, so nothing is recorded unless a run asks for it
+disabled = Instrumentation(enabled = False)
@@ -0,0 +1,68 @@
+import pandas as pd
+import numpy as np
+
+import re
+
+
+# Every state and province a contestant can be from. The names of more than one word are matched whole, so New York, West Virginia and British Columbia are not cut
+#	down to their last word
+usStates = ['Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California', 'Colorado', 'Connecticut', 'Delaware', 'Florida', 'Georgia', 'Hawaii', 'Idaho', 'Illinois',
+	'Indiana', 'Iowa', 'Kansas', 'Kentucky', 'Louisiana', 'Maine', 'Maryland', 'Massachusetts', 'Michigan', 'Minnesota', 'Mississippi', 'Missouri', 'Montana', 'Nebraska',
+	'Nevada', 'New Hampshire', 'New Jersey', 'New Mexico', 'New York', 'North Carolina', 'North Dakota', 'Ohio', 'Oklahoma', 'Oregon', 'Pennsylvania', 'Rhode Island',
+	'South Carolina', 'South Dakota', 'Tennessee', 'Texas', 'Utah', 'Vermont', 'Virginia', 'Washington', 'West Virginia', 'Wisconsin', 'Wyoming', 'District of Columbia',
+	'Puerto Rico']
+
+canadianProvinces = ['Alberta', 'British Columbia', 'Manitoba', 'New Brunswick', 'Newfoundland and Labrador', 'Nova Scotia', 'Ontario', 'Prince Edward Island', 'Quebec',
+	'Saskatchewan', 'Northwest Territories', 'Nunavut', 'Yukon']
+
+# Longer names are tried first, so West Virginia is found before Virginia
+statePattern = re.compile(r'(?:^|[\s,])(' + '|'.join(re.escape(name) for name in sorted(usStates + canadianProvinces, key = len, reverse = True)) + r')\W*$')
+
+# Locations ending in anything else, such as a country, are given their last word, as the analysis always has
+lastWordPattern = re.compile(r'([^\s,]+)\W*$')
+
+# The state found for every location seen so far. The same hometowns appear many times across seasons, and the analyses look them up more than once
+stateMemo = {}
+
+
+def findState(location):
+	""" Finds the state or province at the end of a location
+
+		Args:
+			location: A string holding where a contestant is from, in the format "City, State"
+
+		Returns:
+			A string holding the name of the state or province, or the last word of the location if it does not end in one
+	"""
+	try:
+		return stateMemo[location]
+	except KeyError:
+		pass
+
+	match = statePattern.search(location)
+	if match is None:
+		match = lastWordPattern.search(location)
+
+	stateMemo[location] = match.group(1) if match is not None else location.strip()
+
+	return stateMemo[location]
+
+
+def extractStates(locations):
+	""" Finds the state or province of every location in a column
+
+		Each distinct location is looked up once, and the states are returned as a categorical column whose categories are in the order the states first appear
+
+		Args:
+			locations: A Series holding strings in the format "City, State"
+
+		Returns:
+			A categorical Series holding the state or province of each location, or nothing where the location is missing, with the same index
+	"""
+	codes, uniques = pd.factorize(locations)
+	states = pd.Series([findState(location) for location in uniques], dtype = object)
+
+	stateCodes, stateNames = pd.factorize(states)
+	values = pd.Categorical.from_codes(np.where(codes == -1, -1, stateCodes[codes]), categories = stateNames) if len(uniques) > 0 else pd.Categorical([None] * len(codes))
+
+	return pd.Series(values, index = locations.index, name = 'State')
@@ -0,0 +1,90 @@
+import pandas as pd
+import numpy as np
+import unicodedata
+
+
+# The normalized form of every non-ASCII string seen so far. Tribe names, placements and player names repeat across rows, tables and seasons, so each distinct value is
+#	only normalized once per process
+normalMemo = {}
+
+
+def normalString(x):
+	""" Normalizes the charaters in a string
+
+		ASCII strings are already in NFKD form and are returned as they are, while others are looked up in normalMemo before being normalized
+
+		Args:
+			x: A string
+
+		Returns:
+			A string holding x in NFKD form
+	"""
+	if x.isascii():
+		return x
+
+	try:
+		return normalMemo[x]
+	except KeyError:
+		normalMemo[x] = unicodedata.normalize('NFKD', x)
+		return normalMemo[x]
+
+
+def normalizeSeries(values):
+	""" Normalizes the strings in a column, leaving every other value as it is
+
+		Columns holding only strings are factorized so each distinct value is normalized once, and are returned untouched if none of them change. Columns mixing strings
+			with other values, such as lists, are checked value by value. Columns with no strings are skipped entirely
+
+		Args:
+			values: A Series
+
+		Returns:
+			A Series holding the same values, with every string in NFKD form
+	"""
+	if values.dtype != object:
+		return values
+
+	kind = pd.api.types.infer_dtype(values, skipna = True)
+
+	if kind == 'string':
+		codes, uniques = pd.factorize(values)
+		normalized = [normalString(x) for x in uniques]
+
+		if all(x is y for x, y in zip(normalized, uniques)):
+			return values
+
+		normalized = np.array(normalized + [None], dtype = object)
+		return pd.Series(np.where(codes == -1, values.to_numpy(), normalized[codes]), index = values.index, name = values.name)
+
+	elif kind.startswith('mixed'):
+		return values.map(lambda x: normalString(x) if type(x) == str else x)
+
+	return values
+
+
+def normalizeFrame(frame):
+	""" Normalizes the strings in every column of a DataFrame
+
+		Args:
+			frame: A DataFrame
+
+		Returns:
+			A DataFrame holding the same values, with every string in NFKD form. Columns that did not change are shared with frame rather than copied
+	"""
+	changed = {}
+
+	for i in range(len(frame.columns)):
+		values = frame.iloc[:, i]
+		normalized = normalizeSeries(values)
+
+		if normalized is not values:
+			changed[i] = normalized
+
+	if len(changed) == 0:
+		return frame
+
+	frame = frame.copy(deep = False)
+	for i in changed:
+		frame.isetitem(i, changed[i])
+
+	return frame
@@ -1,9 +1,9 @@
 import pandas as pd 
 import numpy as np
 import re
+import os
 from sqlalchemy import create_engine
 import psycopg2
-import unicodedata
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -26,6 +26,9 @@ from sklearn.linear_model import LogisticRegression
 from sklearn import metrics
 from sklearn.naive_bayes import GaussianNB
 
+import columnar_export
+import normalization
+
 
 def makeDuplDict():
 	findDuplicates = episodes[['Episode', 'Eliminated', 'Season Number']]
@@ -89,23 +92,6 @@ def applyCount(row):
 
 	return counts
 
-def normal(x):
-		""" Normalizes charaters in the given string
-
-			Takes in an element of any type, if it is a string it normalizes it and otherwise it returns the original element
-
-			Args:
-				x: An element
-
-			Returns:
-				An element, if x was a string it is the normalized string, otherwise it is the original element
-
-		"""
-		if type(x) == str:
-			return unicodedata.normalize('NFKD', x)
-		else:
-			return x
-
 # Replace with your database credentials
 user = 'USERNAME'
 password = 'PASSWORD'
@@ -113,10 +99,18 @@ host = 'HOST'
 port = 'PORT'
 database = 'DATABASE'
 
-engine = create_engine(name_or_url = 'postgresql://' + user + ':' + password + '@' + host + ':' + port + '/' + database)
-contestants = pd.read_sql_table('allContestants', engine, schema = 'overall')
-contestants['Called'] = contestants['Called'].apply(normal)
-episodes = pd.read_sql_table('allEpisodes', engine, schema = 'overall')
+# Set this to the folder written by seasons.py --export to read the tables from Parquet instead of the database
+dataDirectory = None
+
+if dataDirectory is None:
+	engine = create_engine(name_or_url = 'postgresql://' + user + ':' + password + '@' + host + ':' + port + '/' + database)
+	contestants = pd.read_sql_table('allContestants', engine, schema = 'overall')
+	episodes = pd.read_sql_table('allEpisodes', engine, schema = 'overall')
+else:
+	contestants = columnar_export.readTable(os.path.join(dataDirectory, 'contestants'), columns = ['Name', 'Called', 'Season Number', 'Is Finalist?', 'Is Winner?'])
+	episodes = columnar_export.readTable(os.path.join(dataDirectory, 'episodes'), columns = ['Episode', 'Eliminated', 'Description', 'Season Number'])
+
+contestants['Called'] = normalization.normalizeSeries(contestants['Called'])
 
 dupleDict = makeDuplDict()
 
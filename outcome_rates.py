@@ -0,0 +1,49 @@
+import pandas as pd
+
+
+def outcomeTable(frame, groupColumn, outcomes, totalLabel = 'Total'):
+	""" Counts how often each group of contestants reaches each outcome, in one grouped pass over the contestants
+
+		For each group, such as the state contestants are from or their age range, the table holds the number of contestants in the group and their percentage of all
+			contestants, then for every outcome the number in the group that reached it, their percentage of everyone who reached it, and the percentage of the group
+			that reached it. A row for every contestant together is added at the end
+
+		Groups are listed in the order of the column's categories if it is categorical, which includes categories no contestant is in, and otherwise in the order they
+			first appear. Percentages of an empty group are left as NaN
+
+		Args:
+			frame: A DataFrame holding the data to be explored, such as the contestants table
+			groupColumn: A string holding the name of the column the contestants are grouped by
+			outcomes: A list of strings holding the names of the columns to count, where a contestant reached the outcome if the value is True
+			totalLabel: A string holding the group name of the row for every contestant
+
+		Returns:
+			A DataFrame with a row per group, followed by the total row, holding the group, Count and Share columns, and for each outcome, '<outcome> Count',
+				'<outcome> Share' and '<outcome> Rate' columns, with every percentage between 0 and 100
+	"""
+	groups = frame[groupColumn]
+
+	# Every count comes from a single grouped sum: a column of ones counts the contestants in each group and each outcome column counts those who reached it
+	flags = pd.DataFrame({outcome: frame[outcome] == True for outcome in outcomes}, index = frame.index)
+	flags.insert(0, 'Count', 1)
+
+	sums = flags.groupby(groups, sort = False, observed = False).sum()
+
+	if isinstance(groups.dtype, pd.CategoricalDtype):
+		order = groups.cat.categories
+	else:
+		order = pd.unique(groups.dropna())
+
+	sums = sums.reindex(order, fill_value = 0)
+	sums.loc[totalLabel] = sums.sum()
+
+	table = pd.DataFrame({groupColumn: sums.index.astype(object)})
+	table['Count'] = sums['Count'].to_numpy()
+	table['Share'] = table['Count'] / sums.loc[totalLabel, 'Count'] * 100
+
+	for outcome in outcomes:
+		table[outcome + ' Count'] = sums[outcome].to_numpy()
+		table[outcome + ' Share'] = table[outcome + ' Count'] / sums.loc[totalLabel, outcome] * 100
+		table[outcome + ' Rate'] = table[outcome + ' Count'] / table['Count'] * 100
+
+	return table
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+
+# Set this environment variable to the address of a fixture_corpus.py server, such as http://127.0.0.1:8000, to read every page from it instead of the live sites
+mirrorVariable = 'SURVIVOR_MIRROR'
+mirror = os.environ.get(mirrorVariable)
+
+
+class PageCache():
+	""" Stores fetched web pages on disk so they can be reused between runs
+
+		A content-addressed cache for HTML pages. The body of each page is saved under the SHA-256 hash of its contents, and an index maps each url to its body along with
+			the ETag and Last-Modified headers the server sent. Entries younger than the time to live are served straight from disk, older entries are revalidated with a
+			conditional request, and the least recently used entries are evicted once the cache grows past its size limit. In offline mode the network is never touched
+
+		Reading a stored page only updates its last use in memory, so close should be called once the cache is no longer needed to save those updates to the index
+
+		Attributes:
+			directory: A string holding the path of the folder the cache is stored in
+			ttl: A number indicating how many seconds a page is used without being revalidated. None means pages never expire
+			maxBytes: An integer indicating the largest total size, in bytes, of the stored pages before old pages are evicted. None means there is no limit
+			offline: A boolean indicating if the cache should only serve stored pages and never use the network
+			session: A requests Session used to make all requests, so connections are reused
+			entries: A dictionary holding urls as keys and dictionaries describing the stored page as values
+
+	"""
+
+	def __init__(self, directory = 'pageCache', ttl = 7 * 24 * 60 * 60, maxBytes = 500 * 1024 * 1024, offline = False, session = None):
+		self.directory = directory
+		self.ttl = ttl
+		self.maxBytes = maxBytes
+		self.offline = offline
+		self.session = session if session is not None else requests.Session()
+
+		self.lock = threading.Lock()
+
+		# Bodies being written by store that no url refers to yet, which evict must not remove, and whether the index has changes that are not yet saved
+		self.pending = set()
+		self.dirty = False
+
+		os.makedirs(os.path.join(self.directory, 'objects'), exist_ok = True)
+
+		self.indexPath = os.path.join(self.directory, 'index.json')
+
+		try:
+			with open(self.indexPath, encoding = 'utf-8') as indexFile:
+				self.entries = json.load(indexFile)
+		except (FileNotFoundError, json.JSONDecodeError):
+			self.entries = {}
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, excTraceback):
+		self.close()
+
+	def close(self):
+		""" Saves the index if reading pages has changed it since it was last saved
+		"""
+		with self.lock:
+			if self.dirty:
+				self.saveIndex()
+
+	def objectPath(self, digest):
+		""" Finds where the body with the given hash is stored
+
+			Args:
+				digest: A string holding the SHA-256 hash of a page body
+
+			Returns:
+				A string holding the path of the file that holds the body
+		"""
+		return os.path.join(self.directory, 'objects', digest + '.html')
+
+	def get(self, url):
+		""" Returns the HTML of a page, using the stored copy when possible
+
+			Serves the page from disk if it is stored and has not expired. Otherwise asks the server for it, sending the stored ETag and Last-Modified values so an
+				unchanged page costs a 304 response instead of a full download
+
+			Args:
+				url: A string holding the url of the page
+
+			Returns:
+				A string holding the HTML of the page
+
+			Raises:
+				LookupError: The cache is offline and the page has never been stored
+				requests.HTTPError: The server responded with an error
+		"""
+		with self.lock:
+			entry = self.entries.get(url)
+
+		if entry is not None and (self.offline or self.isFresh(entry)):
+			text = self.readBody(url, entry)
+			if text is not None:
+				return text
+			entry = None
+
+		if self.offline:
+			raise LookupError('Page is not in the offline cache: ' + url)
+
+		headers = {}
+		if entry is not None:
+			if entry.get('etag'):
+				headers['If-None-Match'] = entry['etag']
+			if entry.get('lastModified'):
+				headers['If-Modified-Since'] = entry['lastModified']
+
+		response = self.session.get(mirrorUrl(url), headers = headers)
+
+		if response.status_code == 304 and entry is not None:
+			text = self.readBody(url, entry)
+			if text is not None:
+				with self.lock:
+					entry['fetched'] = time.time()
+					self.saveIndex()
+				return text
+
+			response = self.session.get(mirrorUrl(url))
+
+		response.raise_for_status()
+
+		self.store(url, response)
+
+		return response.text
+
+	def expire(self, url):
+		""" Marks a stored page as expired, so the next get revalidates it with the server even if its time to live has not passed
+
+			Args:
+				url: A string holding the url of the page
+		"""
+		with self.lock:
+			if url in self.entries:
+				self.entries[url]['fetched'] = 0
+				self.saveIndex()
+
+	def isFresh(self, entry):
+		""" Determines if a stored page can be used without revalidating it
+
+			Args:
+				entry: A dictionary describing a stored page
+
+			Returns:
+				A boolean indicating if the page is younger than the time to live
+		"""
+		return self.ttl is None or time.time() - entry['fetched'] < self.ttl
+
+	def readBody(self, url, entry):
+		""" Reads the stored body of a page and marks it as recently used
+
+			Args:
+				url: A string holding the url of the page
+				entry: A dictionary describing the stored page
+
+			Returns:
+				A string holding the HTML of the page, or None if the body is missing from disk
+		"""
+		try:
+			with open(self.objectPath(entry['digest']), encoding = 'utf-8') as bodyFile:
+				text = bodyFile.read()
+		except FileNotFoundError:
+			with self.lock:
+				self.entries.pop(url, None)
+				self.dirty = True
+			return None
+
+		with self.lock:
+			entry['used'] = time.time()
+			self.dirty = True
+
+		return text
+
+	def store(self, url, response):
+		""" Saves a downloaded page to the cache and evicts old pages if needed
+
+			Args:
+				url: A string holding the url of the page
+				response: The requests Response holding the page
+		"""
+		body = response.text.encode('utf-8')
+		digest = hashlib.sha256(body).hexdigest()
+		path = self.objectPath(digest)
+
+		with self.lock:
+			self.pending.add(digest)
+
+		try:
+			if not os.path.exists(path):
+				temporaryPath = path + '.' + str(threading.get_ident()) + '.tmp'
+				with open(temporaryPath, 'wb') as bodyFile:
+					bodyFile.write(body)
+				os.replace(temporaryPath, path)
+		except Exception:
+			with self.lock:
+				self.pending.discard(digest)
+			raise
+
+		now = time.time()
+
+		with self.lock:
+			self.pending.discard(digest)
+			previous = self.entries.get(url)
+
+			self.entries[url] = {
+				'digest': digest
+				,'size': len(body)
+				,'etag': response.headers.get('ETag')
+				,'lastModified': response.headers.get('Last-Modified')
+				,'fetched': now
+				,'used': now
+			}
+
+			# A page whose contents changed no longer needs its old body, unless another url has the same contents
+			if previous is not None and previous['digest'] != digest:
+				self.removeBody(previous['digest'])
+
+			self.evict()
+			self.saveIndex()
+
+	def removeBody(self, digest):
+		""" Deletes a stored body if no url refers to it and it is not being written. Must be called while holding the lock
+
+			Args:
+				digest: A string holding the SHA-256 hash of a page body
+
+			Returns:
+				A boolean indicating if the body is no longer in use, whether or not it was still on disk
+		"""
+		if digest in self.pending or any(entry['digest'] == digest for entry in self.entries.values()):
+			return False
+
+		try:
+			os.remove(self.objectPath(digest))
+		except FileNotFoundError:
+			pass
+
+		return True
+
+	def evict(self):
+		""" Removes the least recently used pages until the cache fits within maxBytes
+
+			The size of the cache is that of the bodies actually on disk, so bodies no url refers to, such as those left by a run that stopped part way through, are
+				deleted first. Bodies are shared by every url with identical contents, so a body is only deleted once no url refers to it. Must be called while holding
+				the lock
+		"""
+		if self.maxBytes is None:
+			return
+
+		used = {entry['digest'] for entry in self.entries.values()} | self.pending
+
+		sizes = {}
+		with os.scandir(os.path.join(self.directory, 'objects')) as bodies:
+			for body in bodies:
+				if not body.name.endswith('.html'):
+					continue
+
+				digest = body.name[:-len('.html')]
+				if digest in used:
+					sizes[digest] = body.stat().st_size
+				else:
+					self.removeBody(digest)
+
+		totalBytes = sum(sizes.values())
+
+		for url in sorted(self.entries, key = lambda x: self.entries[x]['used']):
+			if totalBytes <= self.maxBytes:
+				break
+
+			digest = self.entries.pop(url)['digest']
+
+			if self.removeBody(digest):
+				totalBytes -= sizes.get(digest, 0)
+
+	def saveIndex(self):
+		""" Writes the index to disk. Must be called while holding the lock
+		"""
+		temporaryPath = self.indexPath + '.tmp'
+		with open(temporaryPath, 'w', encoding = 'utf-8') as indexFile:
+			json.dump(self.entries, indexFile)
+		os.replace(temporaryPath, self.indexPath)
+
+		self.dirty = False
+
+
+def mirrorUrl(url):
+	""" Finds where to request a page from, which is the mirror when SURVIVOR_MIRROR is set
+
+		The mirror serves each site's pages under a folder named after the site, so https://en.wikipedia.org/wiki/Survivor:_Borneo becomes
+			<mirror>/en.wikipedia.org/wiki/Survivor:_Borneo. Pages are still stored in the cache under their real url
+
+		Args:
+			url: A string holding the url of the page
+
+		Returns:
+			A string holding the url to request
+	"""
+	if not mirror:
+		return url
+
+	parsed = urlparse(url)
+
+	return mirror.rstrip('/') + '/' + parsed.netloc + parsed.path + ('?' + parsed.query if parsed.query else '')
+
+
+def fetchPage(url, cache = None):
+	""" Gets the HTML of a page, through the cache if one is given
+
+		Args:
+			url: A string holding the url of the page
+			cache: A PageCache to read from and store in, or None to always download the page
+
+		Returns:
+			A string holding the HTML of the page
+	"""
+	if cache is None:
+		return requests.get(mirrorUrl(url)).text
+
+	return cache.get(url)
@@ -0,0 +1,83 @@
+import season_data
+import page_cache
+import parser_backend
+from seasons import seasons, cacheDirectory
+
+import argparse
+import sys
+
+import pandas as pd
+
+
+def compareParsers(season, html, parsers):
+	""" Parses one season with each parser and compares the tables they produce
+
+		Builds the contestants and episodes DataFrames for the season once per parser, then checks that every parser's DataFrames are identical to the first parser's
+
+		Args:
+			season: A list holding one entry of seasons
+			html: A string holding the HTML of the season's Wikipedia page
+			parsers: A list of strings holding the names of the parsers to compare
+
+		Returns:
+			A list of strings describing each difference found, which is empty if every parser agrees
+	"""
+	results = {}
+	differences = []
+
+	for parser in parsers:
+		temp = season_data.SeasonData(season[0], season[1], season[2], season[3], season[4], season[5], season[6], season[7], season[8], season[9], html = html, parser = parser)
+
+		try:
+			results[parser] = temp.makeFinalTables(upload = False) + (str(temp),)
+		except Exception as ex:
+			differences.append(parser + ' failed: ' + repr(ex))
+
+	if len(results) == 0:
+		return differences
+
+	reference = list(results)[0]
+	tableNames = ['contestants', 'episodes']
+
+	for parser in list(results)[1:]:
+		for i in range(len(tableNames)):
+			try:
+				pd.testing.assert_frame_equal(results[reference][i], results[parser][i])
+			except AssertionError as ex:
+				differences.append(parser + ' ' + tableNames[i] + ' differ from ' + reference + ': ' + str(ex))
+
+		if results[parser][2] != results[reference][2]:
+			differences.append(parser + ' season summary differs from ' + reference + ': ' + results[parser][2])
+
+	return differences
+
+
+if __name__ == '__main__':
+	argParser = argparse.ArgumentParser(description = 'Check that every parser backend builds identical tables from the saved season pages')
+	argParser.add_argument('--parsers', nargs = '+', default = parser_backend.availableParsers(), help = 'parsers to compare, the first is the reference')
+	argParser.add_argument('--cache', default = cacheDirectory, help = 'page cache holding the saved season pages')
+	args = argParser.parse_args()
+
+	cache = page_cache.PageCache(args.cache, offline = True)
+
+	failed = False
+
+	for season in seasons:
+		try:
+			html = cache.get(season[2])
+		except LookupError:
+			print('Season', season[0], 'skipped, its page has not been saved')
+			continue
+
+		differences = compareParsers(season, html, args.parsers)
+
+		if len(differences) == 0:
+			print('Season', season[0], 'identical with', ', '.join(args.parsers))
+		else:
+			failed = True
+			for difference in differences:
+				print('Season', season[0], difference)
+
+	cache.close()
+
+	sys.exit(1 if failed else 0)
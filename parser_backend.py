@@ -0,0 +1,19 @@
+from bs4.builder import builder_registry
+
+import os
+
+
+# The Beautiful Soup parser used by SeasonData and wholeCastScrape.py. 'lxml' is the fastest, 'html5lib' parses the way a browser does, and 'html.parser' is the 
+#	slowest but needs no extra packages. Set the SURVIVOR_PARSER environment variable to change it without editing this file
+defaultParser = os.environ.get('SURVIVOR_PARSER', 'html.parser')
+
+parsers = ['html.parser', 'lxml', 'html5lib']
+
+
+def availableParsers():
+	""" Finds which of the supported parsers are installed
+
+		Returns:
+			A list of strings holding the names of the parsers Beautiful Soup can use
+	"""
+	return [parser for parser in parsers if builder_registry.lookup(parser) is not None]
@@ -0,0 +1,96 @@
+import pandas as pd
+
+import os
+
+import columnar_export
+
+
+class SeasonAccumulator():
+	""" Collects the tables of each season and combines them once at the end
+
+		Each season's contestants and episodes DataFrames are kept in lists and combined with a single concat when they are asked for, so adding a season never copies
+			the seasons before it. The season data is kept as one dictionary per season. If a spill directory is given, each season's DataFrames are instead written to a
+			Parquet dataset partitioned by season as soon as the season is added, and only read back when the combined tables are asked for
+
+		Attributes:
+			spillDirectory: A string holding the path of the folder the Parquet datasets are written to, or None to keep the DataFrames in memory
+			records: A list of SeasonRecords, each holding the season table row of a season
+			frames: A dictionary holding the table names 'contestants' and 'episodes' as keys and lists of each season's DataFrames as values
+			columns: A dictionary holding the table names as keys and lists of the column names seen so far, in order, as values
+
+	"""
+
+	def __init__(self, spillDirectory = None):
+		self.spillDirectory = spillDirectory
+		self.records = []
+		self.frames = {'contestants': [], 'episodes': []}
+		self.columns = {'contestants': [], 'episodes': []}
+
+	def add(self, contestants, episodes, record):
+		""" Adds the tables of one season
+
+			Args:
+				contestants: A DataFrame holding data on the contestants of the season
+				episodes: A DataFrame holding data on the episodes of the season
+				record: A SeasonRecord holding the season table row of the season, as made by SeasonData.seasonRecord
+		"""
+		self.records.append(record)
+
+		for tableName, frame in [('contestants', contestants), ('episodes', episodes)]:
+			for column in frame.columns:
+				if column not in self.columns[tableName]:
+					self.columns[tableName].append(column)
+
+			if self.spillDirectory is None:
+				self.frames[tableName].append(frame)
+			else:
+				self.spill(tableName, frame, record.seasonNum)
+
+	def spill(self, tableName, frame, seasonNum):
+		""" Writes one season's DataFrame to its partition of the Parquet dataset
+
+			Args:
+				tableName: A string, either 'contestants' or 'episodes'
+				frame: A DataFrame holding the season's table
+				seasonNum: An integer indicating the season's number
+		"""
+		columnar_export.writeTable(frame, os.path.join(self.spillDirectory, tableName))
+
+		self.frames[tableName].append(seasonNum)
+
+	def table(self, tableName):
+		""" Combines every season's DataFrame for one table
+
+			Args:
+				tableName: A string, either 'contestants' or 'episodes'
+
+			Returns:
+				A DataFrame holding the table for every season added, in the order they were added
+		"""
+		if self.spillDirectory is None:
+			if len(self.frames[tableName]) == 0:
+				return pd.DataFrame()
+
+			return pd.concat(self.frames[tableName])[self.columns[tableName]]
+
+		if len(self.frames[tableName]) == 0:
+			return pd.DataFrame()
+
+		frame = columnar_export.readTable(os.path.join(self.spillDirectory, tableName), seasons = self.frames[tableName], plain = True)
+
+		return frame[self.columns[tableName]]
+
+	def contestants(self):
+		""" Returns the contestants of every season in one DataFrame
+		"""
+		return self.table('contestants')
+
+	def episodes(self):
+		""" Returns the episodes of every season in one DataFrame
+		"""
+		return self.table('episodes')
+
+	def seasons(self):
+		""" Returns the season table, holding one row for every season added
+		"""
+		return pd.DataFrame([record.row() for record in self.records])
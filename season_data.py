@@ -1,20 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
-import unicodedata
-from sqlalchemy import create_engine
-import psycopg2
+from bs4 import NavigableString, Tag
 
 import pandas as pd
 import numpy as np
 import re
+import sys
 
-# DEFINE THE DATABASE CREDENTIALS
-### If you wish to use this program, update these to a Postgresql database that you have access to
-user = 'USERNAME'
-password = 'PASSWORD'
-host = 'HOST'
-port = 'PORT'
-database = 'DATABASE NAME'
+import db_loader
+from instrumentation import disabled, frameBytes, soupBytes
+import normalization
+import page_cache
+import parser_backend
+from table_locator import TableLocator
 
 
 class SeasonData():
@@ -53,11 +49,16 @@ class SeasonData():
 			conIndex: An integer indicating the index of tables that holds the Contestants Table
 			juryIndex: An integer indicating the index of tables that holds the Jury Table
 			numReunionRows: An integer indicating the number of rows of the Season Summary Table dedicated to the reunion episode
-			tables: A Beautiful Soup object holding a list of all table elements from the season's Wikipedia page
+			cache: A PageCache used to fetch the season's Wikipedia page, or None to always download it
+			html: A string holding the already fetched HTML of the season's Wikipedia page, or None to fetch it
+			parser: A string indicating the Beautiful Soup parser used on the page's tables
+			tables: A TableLocator holding all table elements from the season's Wikipedia page, which parses each table the first time it is used. Set to None once
+				makeFinalTables finishes, so the page and its parse trees can be freed
+			instrumentation: An Instrumentation recording the time spent in each stage of building the season's tables
 
 	"""
 
-	def __init__(self, seasonNum, seasonName, url, mergeName, episodeIndex = 3, seasonSumIndex = 2, voteHistIndex = 4, conIndex = 1, juryIndex = 5, numReunionRows = 1):
+	def __init__(self, seasonNum, seasonName, url, mergeName, episodeIndex = 3, seasonSumIndex = 2, voteHistIndex = 4, conIndex = 1, juryIndex = 5, numReunionRows = 1, cache = None, html = None, parser = parser_backend.defaultParser, instrumentation = None):
 		self.seasonNum = seasonNum
 		self.seasonName = seasonName
 		self.url = url
@@ -86,15 +87,31 @@ class SeasonData():
 		self.juryIndex = juryIndex
 
 		self.numReunionRows = numReunionRows
+		self.cache = cache
+		self.parser = parser
+		self.instrumentation = instrumentation if instrumentation is not None else disabled
 
-		data = requests.get(self.url)
-		html = BeautifulSoup(data.text, 'html.parser')
+		if html is None:
+			with self.instrumentation.stage(self.seasonNum, 'fetch'):
+				html = page_cache.fetchPage(self.url, self.cache)
+			self.instrumentation.count(self.seasonNum, 'bytesFetched', len(html.encode('utf-8')))
 
-		self.tables = html.findAll('table')
+		with self.instrumentation.stage(self.seasonNum, 'locateTables'):
+			self.tables = TableLocator(html, self.parser)	# Only the tables at the indices above are ever parsed
 
 
 	def __str__(self):
-		return f'{self.seasonName}, {self.seasonNum}, {self.winner}, {self.numDays}, {self.numPeople}, {self.numTribeSwaps}, {self.numStartingTribes}, {self.numFinalTribal}, {self.numJury}, {self.reentrySeason}, {self.hasReturningPlayers}, {self.allReturningPlayers}, {self.numReturningPlayers}, {self.hasExileIsland}, {self.hasRedemptionIsland}, {self.isBloodvsWater}, {self.hasIslandGame}, {self.hasEdgeOfExtinction}'
+		return str(self.seasonRecord())
+
+	def seasonRecord(self):
+		""" Collects the data on the season as one row of the season table
+
+			Returns:
+				A SeasonRecord holding the season's values
+		"""
+		return SeasonRecord(self.seasonName, self.seasonNum, self.winner, self.numDays, self.numPeople, int(self.numTribeSwaps), self.numStartingTribes, self.numFinalTribal,
+			int(self.numJury), self.reentrySeason, self.hasReturningPlayers, self.allReturningPlayers, int(self.numReturningPlayers), self.hasExileIsland,
+			self.hasRedemptionIsland, self.isBloodvsWater, self.hasIslandGame, self.hasEdgeOfExtinction)
 
 	def normal(self, x):
 		""" Normalizes charaters in the given string
@@ -109,126 +126,148 @@ class SeasonData():
 
 		"""
 		if type(x) == str:
-			return unicodedata.normalize('NFKD', x)
+			return normalization.normalString(x)
 		else:
 			return x
 
+	def cellText(self, cell):
+		""" Gets the text of a table cell
+
+			Collects the text of the cell straight from the parse tree, writing each line break as a space. Cells holding nothing but a newline are read as N/A
+
+			Args:
+				cell: A Beautiful Soup object holding a th or td element
+
+			Returns:
+				A string holding the text of the cell
+		"""
+		strings = []
+		text = []
+
+		for node in cell.descendants:
+			if type(node) is NavigableString:
+				strings.append(node)
+				text.append(node)
+			elif isinstance(node, Tag) and node.name == 'br':
+				text.append(' ')
+
+		if ''.join(strings) == '\n':
+			return 'N/A\n'
+
+		return ''.join(text)
+
+	def rowCells(self, row):
+		""" Splits an unmerged row into the values it holds
+
+			Joins the text of the cells in the row, then splits it on newlines, dropping empty pieces and replacing non-breaking spaces with normal ones. A cell whose text
+				holds several lines gives several values
+
+			Args:
+				row: A list of strings holding the text of each cell in the row, as returned by unmergeSpan
+
+			Returns:
+				A list of strings holding the values in the row
+		"""
+		return [i.replace(u'\xa0', u' ') for i in ''.join(row).split('\n') if i]
+
+	def rowStrings(self, row):
+		""" Gets every piece of text in a table row
+
+			Walks the row in the parse tree and returns each of its text nodes separately, dropping empty ones and replacing non-breaking spaces with normal ones
+
+			Args:
+				row: A Beautiful Soup object holding a tr element
+
+			Returns:
+				A list of strings holding the text nodes of the row, in order
+		"""
+		return [i.replace(u'\xa0', u' ') for i in row.strings if i]
+
+	def spanSize(self, cell, attribute):
+		""" Reads the rowspan or colspan of a table cell
+
+			Args:
+				cell: A Beautiful Soup object holding a th or td element
+				attribute: A string, either 'rowspan' or 'colspan'
+
+			Returns:
+				An integer indicating how many rows or columns the cell spans, which is one if the attribute is missing or unreadable
+		"""
+		try:
+			return max(int(cell.get(attribute, 1)), 1)
+		except ValueError:
+			return 1
+
 	def unmergeSpan(self, originalTable, funcName):
 		"""Expands a webscraped table into cells
 
-			Takes in a Beautiful Soup table element and unmerges all cells with rowspan or columnspan attributes so that all cells are represented in a list of lists 
-				format.
+			Takes in the rows of a Beautiful Soup table element and unmerges all cells with rowspan or columnspan attributes so that all cells are represented in a list
+				of lists format. The table is laid out on a grid sized from the first row, and each original cell is written into every position it covers in a single
+				pass, so the rows never need to be rebuilt as HTML
 
 			Args:
-				originalTable: A Beautiful Soup object holding the table to be unmerged
+				originalTable: A list of Beautiful Soup objects holding the rows of the table to be unmerged
 				functionName: A string indicating the function that unmergeSpan was called inside
 
 			Returns:
-				A list of lists holding all the data from the original table, where each cell is an element, each row of the table is a list, and they are all in a 
-					larger list
+				A list of lists holding all the data from the original table, where each cell is a string holding the cell's text, each row of the table is a list, and 
+					they are all in a larger list
 		"""
+		with self.instrumentation.stage(self.seasonNum, 'unmergeSpan'):
+			return self.unmergeRows(originalTable, funcName)
 
-		multiRowColumns = {}	# Used to keep track of cells from the original table that span one column but multiple rows. Each key in this dictionary will be the index
-								#	of the column that spans multiple rows, and the value will be a list where the first entry is the number of rows the column spans and
-								#	the second is the value held by the cell
-		updatedTable = []
-		
-		for k in range(len(originalTable)):
-			accomodateRowspan = originalTable[k].findAll(['th', 'td'])
-			
-			if k == 0:
-				# During the first row, find the total number of columns in the table, in order to know how many elements each list should have
-
-				totalCells = 0
-				for cell in accomodateRowspan:
-					try:
-						if cell['colspan'] != 1:
-							totalCells += int(cell['colspan'])
-					except KeyError:
-						totalCells += 1
+	def unmergeRows(self, originalTable, funcName):
+		"""Does the work of unmergeSpan, which wraps it so the time spent can be measured
 
-				totalColumns = totalCells
+			Args:
+				originalTable: A list of Beautiful Soup objects holding the rows of the table to be unmerged
+				functionName: A string indicating the function that unmergeSpan was called inside
 
-				if self.seasonNum == 36 and funcName == 'vhl': # This voting history table had an extra column in only the first row, so it must be removed
-					totalColumns -= 1
+			Returns:
+				A list of lists holding the text of every cell, as described in unmergeSpan
+		"""
+		if len(originalTable) == 0:
+			return []
 
-			# Reset variables to start a new row
-			updatedRow = []
-			ogInd = 0
+		rows = [row.findAll(['th', 'td'], recursive = False) for row in originalTable]
 
-			multiColumnRow = 0	# Used to keep track of cells from the original table that span one row, but multiple columns. multiColumnRow holds the number of columns 
-			multiColVal = ''	#	that the cell spans, and multiColVal holds the value of the cell
+		self.instrumentation.count(self.seasonNum, 'rows', len(rows))
+		self.instrumentation.count(self.seasonNum, 'cells', sum(len(row) for row in rows))
 
-			for i in range(totalColumns): # Repeats once for each cell in the row
-				colspan = False
+		# The first row determines the total number of columns in the table, and so how many elements each list should have
+		totalColumns = sum(self.spanSize(cell, 'colspan') for cell in rows[0])
 
+		if self.seasonNum == 36 and funcName == 'vhl': # This voting history table had an extra column in only the first row, so it must be removed
+			totalColumns -= 1
 
-				if i in multiRowColumns or multiColumnRow != 0: # If the cell in the original table is part of one that spans multiple rows or columns, increase ogInd by
-																# 	one, so as to not go out of bounds from the original number of cells in the table
-					ogInd += 1
+		updatedTable = [[None] * totalColumns for i in range(len(rows))]
 
+		for k in range(len(rows)):
+			updatedRow = updatedTable[k]
+			column = 0
 
+			for cell in rows[k]:
+				while column < totalColumns and updatedRow[column] is not None: # Skip positions already filled by a cell spanning down from an earlier row
+					column += 1
 
-				if multiColumnRow != 0:					# If the current cell is apart of a column that spans multiple rows, append the value that has been saved to the 
-					updatedRow.append(multiColVal)		#	updated row, then decrease the variable to indicate of of the cells has been accounted for
-					multiColumnRow -= 1
+				if column == totalColumns:
+					break
 
-				elif i in multiRowColumns:						# If the current cell is apart of a row that spans multiple columns, append the value that has been saved
-					updatedRow.append(multiRowColumns[i][1])	#	to the updated row, then decrease the variable to indicate the cell has been accounted fro
-					multiRowColumns[i][0] -= 1
+				text = self.cellText(cell)
+				lastRow = min(k + self.spanSize(cell, 'rowspan'), len(rows))
+				lastColumn = min(column + self.spanSize(cell, 'colspan'), totalColumns)
 
-					if multiRowColumns[i][0] == 0:	# If this is zero, the cell has spanned all the rows it spanned in the original table, so it is deleted
-						del multiRowColumns[i]
+				for i in range(k, lastRow):	# Copy the cell into every position it covers
+					spannedRow = updatedTable[i]
+					for j in range(column, lastColumn):
+						if spannedRow[j] is None:
+							spannedRow[j] = text
 
-				else:
-					try:
-						if accomodateRowspan[i - ogInd]['colspan'] != 1:	# Checks if the current cell of the table spans multiple columns by seeing if the colspan attribute
-																			#	is not one
-							colspan = True
-
-							if accomodateRowspan[i - ogInd].string == '\n' or accomodateRowspan[i - ogInd].string == 'N/A\n': 	# Adjusts variables relevant to spanning many 
-								multiColumnRow = int(accomodateRowspan[i - ogInd]['colspan']) - 1 								# 	columns. If there is no string in the 
-								multiColVal = '<td>N/A\n</td>'																	#	current cell, adjust it to say N/A. 
-								accomodateRowspan[i - ogInd].string = 'N/A\n'													#	Otherwise saves the value of the cell.
-							else:
-								multiColumnRow = int(accomodateRowspan[i - ogInd]['colspan']) - 1
-								multiColVal = str(accomodateRowspan[i - ogInd])
-							
-					except KeyError: # Indicates that colspan was not an attribute of the current cell
-						if accomodateRowspan[i - ogInd].text == '\n':
-							accomodateRowspan[i - ogInd].string = 'N/A\n'
+				column = lastColumn
 
-					try:
-						if accomodateRowspan[i - ogInd]['rowspan'] != 1:	# Checks if the current cell of the table spans multiple columns by seeing if the colspan attribute
-																			#	is not one
-							if accomodateRowspan[i - ogInd].string == '\n' or accomodateRowspan[i - ogInd].string == 'N/A\n':	# Adjusts variables relavant to spanning many
-								multiRowColumns[i] = [int(accomodateRowspan[i - ogInd]['rowspan']) - 1, '<td>N/A\n</td>'] 		#	rows, updating empty cells as necessary
-								accomodateRowspan[i - ogInd].string = 'N/A\n'
-							else:
-								multiRowColumns[i] = [int(accomodateRowspan[i - ogInd]['rowspan']) - 1, str(accomodateRowspan[i - ogInd])] 
-
-							if colspan: # Indicates the current cell contains both a row span and a column span and accounts for this with 
-										#	additonal entries to the mulitRowColumn dictionary
-								for j in range (1, multiColumnRow + 1):
-									if accomodateRowspan[i - ogInd].string == '\n' or accomodateRowspan[i - ogInd].string == 'N/A\n':
-										multiRowColumns[i + j] = [int(accomodateRowspan[i - ogInd]['rowspan']) - 1, '<td>N/A\n</td>'] 
-										accomodateRowspan[i - ogInd].string = 'N/A\n'
-									else:
-										multiRowColumns[i + j] = [int(accomodateRowspan[i - ogInd]['rowspan']) - 1, str(accomodateRowspan[i - ogInd])] 
-
-
-					except KeyError: # Indicates rowspan was not an attribute of the current cell
-						if accomodateRowspan[i - ogInd].text == '\n':
-							accomodateRowspan[i - ogInd].string = 'N/A\n'
-
-					updatedRow.append(str(accomodateRowspan[i - ogInd]))
-
-			# Replaces and cleans the row before adding it to the unmerged version of the table
-			accomodateRowspan = updatedRow 
-			accomodateRowspan = [str(i) for i in accomodateRowspan ]
-			accomodateRowspan = ''.join(accomodateRowspan)
-			accomodateRowspan = BeautifulSoup(accomodateRowspan, 'html.parser')
-			updatedTable.append(accomodateRowspan)
+			for j in range(totalColumns):	# Any positions left over had no cell in the original table
+				if updatedRow[j] is None:
+					updatedRow[j] = ''
 
 		return updatedTable
 
@@ -334,7 +373,7 @@ class SeasonData():
 		episodeTable = self.tables[self.episodeIndex]
 
 		rows = episodeTable.findAll('tr')
-
+		self.instrumentation.count(self.seasonNum, 'rows', len(rows))
 
 		descriptions = []
 
@@ -342,12 +381,7 @@ class SeasonData():
 			try:
 				if rows[i]['class'][0] == 'vevent': # Determine what the class of the current cell is to determine if it is information on an episode or an episode 
 													#	description
-					updatedRow = BeautifulSoup(('>|').join(str(rows[i]).split('>')), 'html.parser')
-
-					individualCells = updatedRow.text.split('|')
-
-					individualCells = [i for i in individualCells if i]
-					individualCells = [i.replace(u'\xa0', u' ') for i in individualCells]
+					individualCells = self.rowStrings(rows[i])
 					
 					desiredIndices = [0, 1, 2]	# Some information in the table (such as an episodes rating) is unnessary for this project
 
@@ -371,8 +405,6 @@ class SeasonData():
 				pass
 
 		episodes = pd.DataFrame(descriptions, columns = ['Total Episode Number', 'Season Episode Number', 'Episode Name', 'Description'])
-		episodes = episodes.applymap(self.normal)
-
 
 		return episodes
 
@@ -396,10 +428,7 @@ class SeasonData():
 
 		for episode in seasonSummaryList:
 
-			updatedEpisode = BeautifulSoup((' ').join(str(episode).split('<br/>')), 'html.parser')
-
-			individualCells = updatedEpisode.text.split('\n')
-			individualCells = [i for i in individualCells if i]
+			individualCells = self.rowCells(episode)
 
 			finalSeasonSummmary.append(individualCells)
 
@@ -415,7 +444,6 @@ class SeasonData():
 
 				seasonSummary.insert(3, 'Reward Winner', ['Combined with Immunity' for i in range(len(seasonSummary.index))])
 
-		seasonSummary = seasonSummary.applymap(self.normal)
 		return seasonSummary
 
 
@@ -436,7 +464,7 @@ class SeasonData():
 
 		votingHistoryList = self.unmergeSpan(votingHistoryList, 'vhl')
 
-		numELim = len(votingHistoryList[0].findAll(['th', 'td'])) - 1 # Take away one for the title of the row
+		numELim = len(votingHistoryList[0]) - 1 # Take away one for the title of the row
 
 		votesPerTribal = []
 		for i in range(numELim):
@@ -444,23 +472,19 @@ class SeasonData():
 
 		for i in range(len(votingHistoryList)):
 			if i != 5 and i != 6: # Skip these rows because they contain no data
-				cellsInRow = votingHistoryList[i].findAll(['th', 'td'])
+				cellsInRow = votingHistoryList[i]
 				for j in range(len(votesPerTribal)):	# For each vote of the game, add information from that votes row, including the final vote breakdown and who 
 														#	voted for who
-					if cellsInRow[j + 1].text.strip() != '' and cellsInRow[j + 1].text.strip() != 'N/A':
-						votesPerTribal[j][cellsInRow[0].text.strip()] = cellsInRow[j + 1].text.strip()
+					if cellsInRow[j + 1].strip() != '' and cellsInRow[j + 1].strip() != 'N/A':
+						votesPerTribal[j][cellsInRow[0].strip()] = cellsInRow[j + 1].strip()
 
 		votesPerTribal = pd.DataFrame(votesPerTribal)
-		votesPerTribal = votesPerTribal.applymap(self.normal)
 
 		finalVotingHistory = []
 
 		for vote in votingHistoryList:
 
-			updatedVote = BeautifulSoup((' ').join(str(vote).split('<br/>')), 'html.parser')
-
-			individualCells = updatedVote.text.split('\n')
-			individualCells = [i for i in individualCells if i]
+			individualCells = self.rowCells(vote)
 
 			finalVotingHistory.append(individualCells)
 
@@ -471,7 +495,6 @@ class SeasonData():
 			votesPerTribal, finalVotingHistory = self.removeExtraTitleColumns(finalVotingHistory, votesPerTribal, extraColspanSeasons[self.seasonNum])
 
 		votesPerTribal = pd.DataFrame(votesPerTribal)
-		votesPerTribal = votesPerTribal.applymap(self.normal)
 
 		if self.seasonNum == 13:	# Fix inconsistent name of column from season 13
 			votesPerTribal.rename(columns = {'Voting tribe': 'Tribe'}, inplace = True)
@@ -516,15 +539,14 @@ class SeasonData():
 		if 'Edge of Extinction' in contestantsTest: # Determines if the season contains Edge of Extinction based on column names
 			self.hasEdgeOfExtinction = True
 
-		contestantsList = contestantBase.findAll('tr')[2:]
-		contestantsList = self.unmergeSpan(contestantsList, 'ct')
+		contestantRows = contestantBase.findAll('tr')[2:]
+		contestantsList = self.unmergeSpan(contestantRows, 'ct')
 
 		finalContestants = []
 		reenters = {} 	# Holds the names of contestants that are eliminated and then reenter the game, corresponding to a list of lists indicating the places and days
 						#	they were eliminated
-		for contestant in contestantsList:
-			updatedContestant = BeautifulSoup((' ').join(str(contestant).split('<br/>')), 'html.parser')
-			returnTest = updatedContestant.find('th').findAll('i')
+		for contestantRow, contestant in zip(contestantRows, contestantsList):
+			returnTest = contestantRow.find('th').findAll('i')
 
 			trueReturner = False # Indicates if a contestant has actually played the game before
 
@@ -554,8 +576,7 @@ class SeasonData():
 							allReturns = 1
 							pastSeasons.append(ele.text.strip())
 
-			individualCells = updatedContestant.text.split('\n')
-			individualCells = [i for i in individualCells if i]
+			individualCells = self.rowCells(contestant)
 
 			for pastSeason in pastSeasons:
 				individualCells[0] = individualCells[0].replace(pastSeason, '').strip()
@@ -650,7 +671,6 @@ class SeasonData():
 
 
 		contestants = pd.DataFrame(finalContestants, columns = ['Name', 'Age', 'From', 'Placement', 'Day', 'Returning Player?', 'Num Times Played Before', 'Tribes'])
-		contestants = contestants.applymap(self.normal)
 
 		self.numReturningPlayers = contestants['Returning Player?'].sum()
 
@@ -757,7 +777,10 @@ class SeasonData():
 		# Use the episode number to combine data on each episode with the voting information for each episode
 		episodesWithTribal = episodeTable.merge(votesPerTribal, left_on = 'Season Episode Number', right_on = 'Episode')
 
-		episodesWithTribal['Eliminated'] = episodesWithTribal['Eliminated'].apply(self.normal)
+		# The tables are only normalized once they are built, so the names they are merged on are normalized first. Otherwise a name written with an accent or a
+		#	non-breaking space in one table would not match the other
+		episodesWithTribal['Eliminated'] = normalization.normalizeSeries(episodesWithTribal['Eliminated'])
+		seasonSummary = seasonSummary.assign(**{'Eliminated Player': normalization.normalizeSeries(seasonSummary['Eliminated Player'])})
 
 		# Use Episode number and who was eliminated to add in data on challenge wins for each episode
 		episodesWithSeasonSummary = episodesWithTribal.merge(seasonSummary, how = 'left', left_on = ['Season Episode Number', 'Eliminated'], right_on = ['Episode Number', 'Eliminated Player'])
@@ -783,24 +806,44 @@ class SeasonData():
 
 
 
-	def makeFinalTables(self):
+	def makeFinalTables(self, upload = True):
 		"""Create tables and update instance variables
 
 			Processes all the tables to create episodes and contestants DataFrames. Updates instance variables based on data in the DataaFrames. Uploads the episodes 
 				and contestants tables to a Postgresql server
 
+			Args:
+				upload: A boolean indicating if the tables should be uploaded here. Parallel runs parse in worker processes and upload from the main process instead
+
 			Returns:
 				A DataFrame holding data on the contestants of the season
 				A DataFrame holding data on the episodes of the season
 
 		"""
+		stage = lambda name: self.instrumentation.stage(self.seasonNum, name)
+
 		# Calls the above functions to make desired DataFrames for the season
-		episodeTable = self.processEpisodeTable()
-		seasonSummary = self.processSeasonSummaryTable()
-		called, votingHistories, votesPerTribal = self.processVotingHistory()
-		contestants = self.processContestantsTable(called, votingHistories)
-		contestants = self.addJurytoContestants(contestants)
-		episodes = self.finishEpisodeTable(episodeTable, votesPerTribal, seasonSummary)
+		with stage('processEpisodeTable'):
+			episodeTable = self.processEpisodeTable()
+		with stage('processSeasonSummaryTable'):
+			seasonSummary = self.processSeasonSummaryTable()
+		with stage('processVotingHistory'):
+			called, votingHistories, votesPerTribal = self.processVotingHistory()
+		with stage('processContestantsTable'):
+			contestants = self.processContestantsTable(called, votingHistories)
+		with stage('addJurytoContestants'):
+			contestants = self.addJurytoContestants(contestants)
+		with stage('finishEpisodeTable'):
+			episodes = self.finishEpisodeTable(episodeTable, votesPerTribal, seasonSummary)
+
+		# Normalize the characters in both tables once they are complete, so every comparison above is made between the names exactly as Wikipedia writes them
+		with stage('normalize'):
+			contestants = normalization.normalizeFrame(contestants)
+			episodes = normalization.normalizeFrame(episodes)
+
+		# Tables are parsed the first time a stage uses them, so the time spent building them is recorded as its own stage as well as inside the stage that asked
+		self.instrumentation.addTime(self.seasonNum, 'soup', self.tables.parseWallSeconds, self.tables.parseCpuSeconds, len(self.tables.parsed))
+		self.instrumentation.count(self.seasonNum, 'soupConstructions', len(self.tables.parsed))
 
 		# Set final variables
 		self.winner = contestants[contestants['Is Winner?'] == True]['Name'].values[0]
@@ -821,31 +864,106 @@ class SeasonData():
 			if int(self.numReturningPlayers) == int(self.numPeople):
 				self.allReturningPlayers = True
 
-		# Upload the DataFrames to the RDS as PostGreSQL files
-		try:
-			engine = create_engine(name_or_url = 'postgresql://' + user + ':' + password + '@' + host + ':' + port + '/' + database)
-			print('Connection Successful')
+		if self.instrumentation.enabled and self.instrumentation.memory:	# Sizes of the page and parse trees about to be released, and of the tables that are kept
+			self.instrumentation.count(self.seasonNum, 'soupBytes', sys.getsizeof(self.tables.html) + sum(soupBytes(table) for table in self.tables.parsed.values() if table is not None))
+			self.instrumentation.count(self.seasonNum, 'contestantsFrameBytes', frameBytes(contestants))
+			self.instrumentation.count(self.seasonNum, 'episodesFrameBytes', frameBytes(episodes))
 
-			contestants.to_sql('survivorContestantsSeason' + str(self.seasonNum), engine, schema = 'contestants', if_exists = 'replace', index = False)
-			episodes.to_sql('survivorEpisodesSeason' + str(self.seasonNum), engine, schema = 'episodes', if_exists = 'replace', index = False)
+		# Every value needed from the page is now in the tables and the variables above, so the page and its parse trees are released
+		self.tables = None
 
-		except Exception as ex:
-			print('Connection Unsucessful', ex)
+		if upload:
+			uploadSeason(self.seasonNum, contestants, episodes, instrumentation = self.instrumentation)
 
 		return contestants, episodes
 
 
+class SeasonRecord():
+	""" Holds the values of one season's row of the season table
 
+		Kept once a season is finished in place of the SeasonData object, so a run holding every season, or sending seasons back from worker processes, only keeps these
+			values. Uses __slots__ so each record is a small fixed set of fields
 
+		Attributes:
+			columns: A list of tuples, shared by every record, each holding a column name of the season table and the attribute holding its value, in column order
+			Every other attribute matches the SeasonData attribute of the same name
 
+	"""
 
+	columns = [
+		('Season Name', 'seasonName')
+		,('Season Number', 'seasonNum')
+		,('Winner', 'winner')
+		,('Number of Days', 'numDays')
+		,('Number of Players', 'numPeople')
+		,('Number of Tribe Swaps', 'numTribeSwaps')
+		,('Number of Starting Tribes', 'numStartingTribes')
+		,('Number at Final Tribal', 'numFinalTribal')
+		,('Number on Jury', 'numJury')
+		,('Has Players Reenter?', 'reentrySeason')
+		,('Has Returning Players?', 'hasReturningPlayers')
+		,('All Returning Players?', 'allReturningPlayers')
+		,('Number of Returning Players', 'numReturningPlayers')
+		,('Has Exile Island?', 'hasExileIsland')
+		,('Has Redemption Island?', 'hasRedemptionIsland')
+		,('Is Blood vs Water?', 'isBloodvsWater')
+		,('Has Island Game?', 'hasIslandGame')
+		,('Has Edge of Extinction?', 'hasEdgeOfExtinction')
+	]
+
+	__slots__ = [attribute for column, attribute in columns]
+
+	def __init__(self, *values):
+		for (column, attribute), value in zip(self.columns, values):
+			setattr(self, attribute, value)
 
-	
+	def __str__(self):
+		return ', '.join(str(getattr(self, attribute)) for column, attribute in self.columns)
+
+	def row(self):
+		""" Gives the record as a row of the season table
+
+			Returns:
+				A dictionary holding the season table's column names as keys and the season's values as values, in column order
+		"""
+		return {column: getattr(self, attribute) for column, attribute in self.columns}
 
 
+def loadSeason(seasonNum, contestants, episodes, engine = None, instrumentation = None):
+	"""Loads the tables of one season into the database, raising any error
 
+		Args:
+			seasonNum: An integer indicating the season's number
+			contestants: A DataFrame holding data on the contestants of the season
+			episodes: A DataFrame holding data on the episodes of the season
+			engine: A SQLAlchemy Engine, or None to use the engine shared by the run
+			instrumentation: An Instrumentation recording the time spent uploading, or None to not record it
+
+	"""
+	if instrumentation is None:
+		instrumentation = disabled
 
+	with instrumentation.stage(seasonNum, 'upload'):
+		db_loader.loadFrame(contestants, 'survivorContestantsSeason' + str(seasonNum), 'contestants', engine)
+		db_loader.loadFrame(episodes, 'survivorEpisodesSeason' + str(seasonNum), 'episodes', engine)
 
 
+def uploadSeason(seasonNum, contestants, episodes, engine = None, instrumentation = None):
+	"""Uploads the tables of one season
 
+		Uploads the episodes and contestants tables of a season to the RDS as PostGreSQL tables. Failures are printed rather than raised so one season cannot stop a run
+
+		Args:
+			seasonNum: An integer indicating the season's number
+			contestants: A DataFrame holding data on the contestants of the season
+			episodes: A DataFrame holding data on the episodes of the season
+			engine: A SQLAlchemy Engine, or None to use the engine shared by the run
+			instrumentation: An Instrumentation recording the time spent uploading, or None to not record it
+
+	"""
+	try:
+		loadSeason(seasonNum, contestants, episodes, engine, instrumentation)
+		print('Upload Successful')
 
+	except Exception as ex:
+		print('Upload Unsucessful', ex)
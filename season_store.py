@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import re
+import time
+import traceback
+from urllib.parse import unquote, urlparse
+
+import pandas as pd
+
+import columnar_export
+
+
+# The MediaWiki API asks for at most this many page titles in one request
+titlesPerRequest = 50
+
+revisionPattern = re.compile(r'"wgRevisionId":\s*(\d+)')
+
+
+class SeasonStore():
+	""" Keeps the processed tables of each season along with the version of the page they came from
+
+		The contestants, episodes and season tables of every processed season are kept as Parquet datasets partitioned by season, and a manifest records which version
+			of the season's Wikipedia page each season was built from and when. A later run can compare the current version of each page with the manifest and reuse the
+			stored tables of every season whose page has not changed. Seasons that fail are recorded in a separate file along with the error, so a resumed run knows which
+			seasons still need to be processed
+
+		Attributes:
+			directory: A string holding the path of the folder the store is kept in
+			manifestPath: A string holding the path of the manifest file
+			manifest: A dictionary holding season numbers, as strings, as keys and dictionaries describing the stored season as values
+			failuresPath: A string holding the path of the file recording failed seasons
+			failures: A dictionary holding the numbers of failed seasons, as strings, as keys and dictionaries describing the failure as values
+
+	"""
+
+	def __init__(self, directory = 'seasonStore'):
+		self.directory = directory
+		self.manifestPath = os.path.join(directory, 'manifest.json')
+		self.failuresPath = os.path.join(directory, 'failures.json')
+
+		os.makedirs(directory, exist_ok = True)
+
+		self.manifest = readJson(self.manifestPath)
+		self.failures = readJson(self.failuresPath)
+
+	def isCurrent(self, seasonNum, source):
+		""" Determines if the stored tables of a season were built from the given version of its page
+
+			Args:
+				seasonNum: An integer indicating the season's number
+				source: A string identifying the current version of the season's page, as made by sourceVersion
+
+			Returns:
+				A boolean indicating if the season is stored and its page has not changed since
+		"""
+		entry = self.manifest.get(str(seasonNum))
+
+		return entry is not None and entry['source'] == source
+
+	def isComplete(self, seasonNum):
+		""" Determines if a season has been processed and stored, whatever version of its page it came from
+
+			Args:
+				seasonNum: An integer indicating the season's number
+
+			Returns:
+				A boolean indicating if the season's tables are in the store
+		"""
+		return str(seasonNum) in self.manifest
+
+	def save(self, seasonNum, contestants, episodes, record, source):
+		""" Stores the tables of a season and records the version of the page they came from
+
+			Args:
+				seasonNum: An integer indicating the season's number
+				contestants: A DataFrame holding data on the contestants of the season
+				episodes: A DataFrame holding data on the episodes of the season
+				record: A SeasonRecord holding the season's row of the season table
+				source: A string identifying the version of the season's page the tables were built from, or None if it is not known
+		"""
+		seasons = pd.DataFrame([record.row()])
+
+		for tableName, frame in zip(columnar_export.tableNames, [seasons, contestants, episodes]):
+			columnar_export.writeTable(frame, os.path.join(self.directory, tableName))
+
+		self.manifest[str(seasonNum)] = {'source': source, 'processed': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+		writeJson(self.manifestPath, self.manifest)
+
+		if self.failures.pop(str(seasonNum), None) is not None:
+			writeJson(self.failuresPath, self.failures)
+
+	def recordFailure(self, seasonNum, ex):
+		""" Records that a season failed
+
+			The season is removed from the manifest, so a resumed or incremental run processes it again rather than using tables stored by an earlier run
+
+			Args:
+				seasonNum: An integer indicating the season's number
+				ex: The exception the season raised
+		"""
+		if self.manifest.pop(str(seasonNum), None) is not None:
+			writeJson(self.manifestPath, self.manifest)
+
+		self.failures[str(seasonNum)] = {'error': repr(ex), 'traceback': ''.join(traceback.format_exception(type(ex), ex, ex.__traceback__)), 'failed': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+		writeJson(self.failuresPath, self.failures)
+
+	def completedSeasons(self):
+		""" Lists the seasons in the store
+
+			Returns:
+				A list of integers holding the numbers of the stored seasons, in order
+		"""
+		return sorted(int(seasonNum) for seasonNum in self.manifest)
+
+	def load(self, seasonNums):
+		""" Reads the stored tables of the given seasons
+
+			Args:
+				seasonNums: A list of integers holding the season numbers to read
+
+			Returns:
+				A DataFrame holding the season table rows of the seasons
+				A DataFrame holding the contestants of the seasons
+				A DataFrame holding the episodes of the seasons
+		"""
+		return tuple(columnar_export.readTable(os.path.join(self.directory, tableName), seasons = seasonNums, plain = True) for tableName in columnar_export.tableNames)
+
+
+def readJson(path):
+	""" Reads a JSON file holding a dictionary
+
+		Args:
+			path: A string holding the path of the file
+
+		Returns:
+			A dictionary holding the file's contents, or an empty dictionary if the file is missing or unreadable
+	"""
+	try:
+		with open(path, encoding = 'utf-8') as jsonFile:
+			return json.load(jsonFile)
+	except (FileNotFoundError, json.JSONDecodeError):
+		return {}
+
+
+def writeJson(path, contents):
+	""" Writes a dictionary to a JSON file, replacing the file in one step so an interrupted run never leaves it half written
+
+		Args:
+			path: A string holding the path of the file
+			contents: A dictionary to write
+	"""
+	temporaryPath = path + '.tmp'
+	with open(temporaryPath, 'w', encoding = 'utf-8') as jsonFile:
+		json.dump(contents, jsonFile, indent = 1, sort_keys = True)
+	os.replace(temporaryPath, path)
+
+
+def pageTitle(url):
+	""" Gets the title of a Wikipedia page from its url
+
+		Args:
+			url: A string holding the url of a Wikipedia article
+
+		Returns:
+			A string holding the title of the article, with spaces rather than underscores
+	"""
+	return unquote(urlparse(url).path.split('/wiki/', 1)[1]).replace('_', ' ')
+
+
+def fetchRevisionIds(urls, session):
+	""" Asks Wikipedia for the current revision of each page
+
+		Uses the MediaWiki API, which answers for up to 50 pages per request, so checking every season costs one request rather than downloading each page
+
+		Args:
+			urls: A list of strings holding the urls of Wikipedia articles
+			session: A requests Session used to make the requests
+
+		Returns:
+			A dictionary holding each url whose revision was found as keys and the integer revision id as values
+	"""
+	revisions = {}
+
+	for start in range(0, len(urls), titlesPerRequest):
+		batch = urls[start:start + titlesPerRequest]
+		titles = {url: pageTitle(url) for url in batch}
+
+		apiUrl = urlparse(batch[0])._replace(path = '/w/api.php', query = '', fragment = '').geturl()
+		response = session.get(apiUrl, params = {'action': 'query', 'prop': 'revisions', 'rvprop': 'ids', 'redirects': 1, 'format': 'json', 'formatversion': 2, 'titles': '|'.join(titles.values())})
+		response.raise_for_status()
+		query = response.json()['query']
+
+		# The API reports pages under their normalized and redirected titles, so follow each requested title to the one it was answered under
+		renamed = {}
+		for change in query.get('normalized', []) + query.get('redirects', []):
+			renamed[change['from']] = change['to']
+
+		pageRevisions = {}
+		for page in query.get('pages', []):
+			if 'revisions' in page:
+				pageRevisions[page['title']] = page['revisions'][0]['revid']
+
+		for url, title in titles.items():
+			while title in renamed:
+				title = renamed[title]
+
+			if title in pageRevisions:
+				revisions[url] = pageRevisions[title]
+
+	return revisions
+
+
+def sourceVersion(revision = None, html = None):
+	""" Makes the string identifying a version of a page
+
+		The revision id is used when it is known, either from the API or from the page itself. Otherwise the SHA-256 hash of the page's HTML is used
+
+		Args:
+			revision: An integer holding the page's revision id, or None if it is not known
+			html: A string holding the HTML of the page, used when revision is None
+
+		Returns:
+			A string such as 'revision:1123581321' or 'sha256:...'
+	"""
+	if revision is None and html is not None:
+		match = revisionPattern.search(html)
+		if match is not None:
+			revision = int(match.group(1))
+
+	if revision is not None:
+		return 'revision:' + str(revision)
+
+	return 'sha256:' + hashlib.sha256(html.encode('utf-8')).hexdigest()
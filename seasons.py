@@ -1,16 +1,34 @@
 import season_data
-import pandas as pd
-from sqlalchemy import create_engine
-import psycopg2
+import db_loader
+from season_accumulator import SeasonAccumulator
+import columnar_export
+import page_cache
+import parser_backend
+from instrumentation import Instrumentation, disabled, frameBytes
+from season_store import SeasonStore, fetchRevisionIds, sourceVersion
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
 
 
-# DEFINE THE DATABASE CREDENTIALS
-### If you wish to use this program, update these to a Postgresql database that you have access to
-user = 'USERNAME'
-password = 'PASSWORD'
-host = 'HOST'
-port = 'PORT'
-database = 'DATABASE NAME'
+# PAGE CACHE SETTINGS
+### Wikipedia pages are saved in cacheDirectory and reused without asking Wikipedia again for cacheTTL seconds, after which they are revalidated. Once the saved pages
+###	pass cacheMaxBytes the least recently used are removed. Set offline to True to only use pages that have already been saved
+cacheDirectory = 'pageCache'
+cacheTTL = 7 * 24 * 60 * 60
+cacheMaxBytes = 500 * 1024 * 1024
+offline = False
+
+# PARALLEL SETTINGS
+### Used when the script is run with --parallel. fetchWorkers is the number of pages downloaded at once and parseWorkers is the number of processes parsing seasons
+fetchWorkers = 8
+parseWorkers = os.cpu_count()
+
+# STORE SETTINGS
+### The tables of each finished season are saved in storeDirectory, along with the revision of the Wikipedia page they were built from and any seasons that failed.
+###	--resume uses it to skip the seasons already finished and --incremental to skip the seasons whose page has not changed
+storeDirectory = 'seasonStore'
 
 # Data was added manually, and contains each seasons number, name, a link to its Wikipedia page, the name of the merge tribe, and finally the indices of the relevant tables
 #	on the Wikipedia page, which change due to inconsistant formatting across pages. The final value is the number of rows to skip for the reunion episode on the season 
@@ -60,39 +78,370 @@ seasons = [
 	,[42, 'Survivor 42', 'https://en.wikipedia.org/wiki/Survivor_42', 'Kula Kula', 3, 2, 4, 1, 5, 1]
 ]
 
-# The start of compiliation of tables that hold data fro all seasons
-columnTitles = ['Season Name', 'Season Number', 'Season Winner', 'Num Days', 'Num People', 'Num Tribe Swaps', 'Num Starting Tribes', 'Num Finalists', 'Num on Jury', 'Reentry Season?']
-forSeasonTable = []
+def parseSeason(season, html, parser = parser_backend.defaultParser, instrumentation = None):
+	""" Builds the tables for one season from its already fetched Wikipedia page
+
+		Used as the unit of work for the process pool, so it returns only the finished tables and the compact SeasonRecord, never the SeasonData object or its page.
+			The Instrumentation is a copy made for the worker process, so it is returned for the main process to merge
+
+		Args:
+			season: A list holding one entry of seasons
+			html: A string holding the HTML of the season's Wikipedia page
+			parser: A string indicating the Beautiful Soup parser to use
+			instrumentation: An Instrumentation to record the season's stages in, or None to not record them
+
+		Returns:
+			A DataFrame holding data on the contestants of the season
+			A DataFrame holding data on the episodes of the season
+			A SeasonRecord holding the season's row of the season table
+			The Instrumentation holding what was recorded, or None if none was given
+	"""
+	if instrumentation is None:
+		instrumentation = disabled
+
+	with instrumentation.profile(season[0]), instrumentation.stage(season[0], 'season'):
+		temp = season_data.SeasonData(season[0], season[1], season[2], season[3], season[4], season[5], season[6], season[7], season[8], season[9], html = html, parser = parser, instrumentation = instrumentation)
+		currContestants, currEpisodes = temp.makeFinalTables(upload = False)
+
+	if not instrumentation.enabled:
+		instrumentation = None
+
+	return currContestants, currEpisodes, temp.seasonRecord(), instrumentation
+
+
+def fetchSeason(season, cache, instrumentation):
+	""" Fetches the Wikipedia page of one season, recording the time and bytes it took
+
+		Args:
+			season: A list holding one entry of seasons
+			cache: A PageCache used to fetch the page
+			instrumentation: An Instrumentation to record the fetch in
+
+		Returns:
+			A string holding the HTML of the page
+	"""
+	with instrumentation.stage(season[0], 'fetch'):
+		html = page_cache.fetchPage(season[2], cache)
+
+	instrumentation.count(season[0], 'bytesFetched', len(html.encode('utf-8')))
+
+	return html
+
+
+def loadOrRecordFailure(seasonNum, contestants, episodes, failures, instrumentation):
+	""" Loads the tables of one season on a BackgroundWriter, recording a failed upload as a failure of its season rather than stopping the writer
+
+		Args:
+			seasonNum: An integer indicating the season's number
+			contestants: A DataFrame holding data on the contestants of the season
+			episodes: A DataFrame holding data on the episodes of the season
+			failures: A dictionary that the season's number and exception are added to if the upload fails, or None to raise the exception
+			instrumentation: An Instrumentation recording the time spent uploading
+	"""
+	try:
+		season_data.loadSeason(seasonNum, contestants, episodes, None, instrumentation)
+
+	except Exception as ex:
+		if failures is None:
+			raise
+		print('Season ' + str(seasonNum) + ' upload failed', repr(ex))
+		failures[seasonNum] = ex
+
+
+def runSerial(seasons, cache, parser = parser_backend.defaultParser, failures = None, writer = None, instrumentation = None, uploadFailures = None):
+	""" Fetches, parses and uploads each season one after another
+
+		Args:
+			seasons: A list of seasons, in the format of seasons
+			cache: A PageCache used to fetch the Wikipedia pages
+			parser: A string indicating the Beautiful Soup parser to use
+			failures: A dictionary that each failed season's number and exception are added to, or None to stop at the first failure
+			writer: A BackgroundWriter the uploads are handed to, or None to upload each season before moving on to the next
+			instrumentation: An Instrumentation to record each season's stages in, or None to not record them
+			uploadFailures: A dictionary that the number and exception of each season whose upload on writer fails are added to, or None to stop the writer at the
+				first failed upload
+
+		Yields:
+			The contestants DataFrame, episodes DataFrame and SeasonRecord of each season that succeeds, in season order
+	"""
+	if instrumentation is None:
+		instrumentation = disabled
+
+	for season in seasons:
+		try:
+			# Creates DataFrames for the season and uploads them to the RDS
+			with instrumentation.profile(season[0]), instrumentation.stage(season[0], 'season'):
+				temp = season_data.SeasonData(season[0], season[1], season[2], season[3], season[4], season[5], season[6], season[7], season[8], season[9], cache = cache, parser = parser, instrumentation = instrumentation)
+				currContestants, currEpisodes = temp.makeFinalTables(upload = writer is None)
+
+		except Exception as ex:
+			if failures is None:
+				raise
+			print('Season ' + str(season[0]) + ' failed', repr(ex))
+			failures[season[0]] = ex
+			continue
+
+		if writer is not None:
+			writer.submit(loadOrRecordFailure, season[0], currContestants, currEpisodes, uploadFailures, instrumentation)
+
+		yield currContestants, currEpisodes, temp.seasonRecord()
+
+
+def runParallel(seasons, cache, numFetchWorkers, numParseWorkers, parser = parser_backend.defaultParser, failures = None, writer = None, instrumentation = None, uploadFailures = None):
+	""" Fetches pages on a thread pool and parses them on a process pool
+
+		Every page is requested at once, bounded by numFetchWorkers, and each season is handed to the process pool as soon as its page arrives, in whatever order the
+			pages arrive. The parsed seasons are then uploaded from this process in season order, so the results match runSerial
+
+		Args:
+			seasons: A list of seasons, in the format of seasons
+			cache: A PageCache used to fetch the Wikipedia pages
+			numFetchWorkers: An integer indicating the number of pages downloaded at once
+			numParseWorkers: An integer indicating the number of processes parsing seasons
+			parser: A string indicating the Beautiful Soup parser to use
+			failures: A dictionary that each failed season's number and exception are added to, or None to stop at the first failure
+			writer: A BackgroundWriter the uploads are handed to, or None to upload each season from this process before yielding it
+			instrumentation: An Instrumentation to record each season's stages in, or None to not record them. Stages run in the worker processes are merged into it
+			uploadFailures: A dictionary that the number and exception of each season whose upload on writer fails are added to, or None to stop the writer at the
+				first failed upload
+
+		Yields:
+			The contestants DataFrame, episodes DataFrame and SeasonRecord of each season that succeeds, in season order
+	"""
+	if instrumentation is None:
+		instrumentation = disabled
+
+	# Each worker records into an empty Instrumentation that is merged back here, so what this process has already recorded is not counted twice
+	workerInstrumentation = None
+	if instrumentation.enabled:
+		workerInstrumentation = Instrumentation(profileDirectory = instrumentation.profileDirectory, memory = instrumentation.memory)
+
+	with ThreadPoolExecutor(max_workers = numFetchWorkers) as fetchPool, ProcessPoolExecutor(max_workers = numParseWorkers) as parsePool:
+		# Each fetch is mapped back to the position of its season, so the parses can be put back in season order
+		fetches = {fetchPool.submit(fetchSeason, season, cache, instrumentation): i for i, season in enumerate(seasons)}
+
+		# Pages are handed over in the order they arrive, so a slow page only holds back its own season. A failed download fails only its own season, so every other
+		#	season is still handed to the process pool
+		parses = [None] * len(seasons)
+		for fetch in as_completed(fetches):
+			i = fetches[fetch]
+			try:
+				parses[i] = parsePool.submit(parseSeason, seasons[i], fetch.result(), parser, workerInstrumentation)
+			except Exception as ex:
+				if failures is None:
+					raise
+				parses[i] = ex
+
+		for season, parse in zip(seasons, parses):
+			try:
+				if isinstance(parse, Exception):
+					raise parse
+				currContestants, currEpisodes, record, workerRecorded = parse.result()
+
+			except Exception as ex:
+				if failures is None:
+					raise
+				print('Season ' + str(season[0]) + ' failed', repr(ex))
+				failures[season[0]] = ex
+				continue
+
+			if workerRecorded is not None:
+				instrumentation.merge(workerRecorded)
+
+			if writer is None:
+				season_data.uploadSeason(season[0], currContestants, currEpisodes, instrumentation = instrumentation)
+			else:
+				writer.submit(loadOrRecordFailure, season[0], currContestants, currEpisodes, uploadFailures, instrumentation)
+
+			yield currContestants, currEpisodes, record
+
+
+def dropSeasons(frame, seasonNums):
+	""" Removes the rows of the given seasons from a table
+
+		Args:
+			frame: A DataFrame holding a Season Number column, or an empty DataFrame
+			seasonNums: A collection of integers holding the numbers of the seasons to remove
+
+		Returns:
+			A DataFrame holding every other season's rows
+	"""
+	if len(seasonNums) == 0 or 'Season Number' not in frame.columns:
+		return frame
+
+	return frame[~frame['Season Number'].isin(list(seasonNums))]
+
+
+def findChangedSeasons(seasons, store, cache):
+	""" Finds the seasons whose Wikipedia page has changed since they were stored
+
+		The current revision of every page is asked for in one batch from the Wikipedia API. A page whose revision cannot be found this way is fetched instead and
+			identified by the revision written in the page, or failing that by the hash of its HTML
+
+		Args:
+			seasons: A list of seasons, in the format of seasons
+			store: A SeasonStore holding the seasons processed before
+			cache: A PageCache used to fetch the Wikipedia pages
+
+		Returns:
+			A dictionary holding the number of each changed season as keys and the string identifying its current page version as values
+	"""
+	urls = [season[2] for season in seasons]
+
+	try:
+		revisions = {} if cache.offline else fetchRevisionIds(urls, cache.session)
+	except Exception as ex:
+		print('Could not get revisions from Wikipedia, comparing pages instead', ex)
+		revisions = {}
+
+	changed = {}
+
+	for season in seasons:
+		if season[2] in revisions:
+			source = sourceVersion(revision = revisions[season[2]])
+		else:
+			source = sourceVersion(html = page_cache.fetchPage(season[2], cache))
+
+		if not store.isCurrent(season[0], source):
+			changed[season[0]] = source
+
+			if season[2] in revisions:	# The stored copy of the page may be older than the revision, so make the cache check with Wikipedia
+				cache.expire(season[2])
+
+	return changed
+
+
+if __name__ == '__main__':
+	argParser = argparse.ArgumentParser(description = 'Scrape every Survivor season from Wikipedia and upload the tables')
+	argParser.add_argument('--parallel', action = 'store_true', help = 'fetch pages concurrently and parse seasons in a process pool')
+	argParser.add_argument('--fetch-workers', type = int, default = fetchWorkers, help = 'number of pages downloaded at once with --parallel')
+	argParser.add_argument('--workers', type = int, default = parseWorkers, help = 'number of processes parsing seasons with --parallel')
+	argParser.add_argument('--spill', metavar = 'DIRECTORY', help = 'write each season to a Parquet dataset in DIRECTORY as it finishes instead of holding it in memory')
+	argParser.add_argument('--export', metavar = 'DIRECTORY', help = 'also write the season, contestants and episodes tables to Parquet datasets in DIRECTORY')
+	argParser.add_argument('--incremental', action = 'store_true', help = 'only process and upload the seasons whose Wikipedia page changed since the last --incremental run')
+	argParser.add_argument('--pipelined', action = 'store_true', help = 'upload finished seasons on a background thread while the next seasons are fetched and parsed')
+	argParser.add_argument('--resume', action = 'store_true', help = 'skip the seasons already saved by an earlier run, processing only the seasons that failed or were never reached')
+	argParser.add_argument('--timings', metavar = 'FILE', help = 'write the time spent in each stage of each season, with counts of rows, cells, parsed tables and bytes fetched, to FILE as CSV if it ends in .csv and JSON otherwise')
+	argParser.add_argument('--memory', action = 'store_true', help = 'also track the peak and net memory of each stage with tracemalloc, and the sizes of the parse trees and tables, in the --timings report')
+	argParser.add_argument('--profile', metavar = 'DIRECTORY', help = 'write a cProfile dump of each season to DIRECTORY')
+	argParser.add_argument('--parser', default = parser_backend.defaultParser, choices = parser_backend.parsers, help = 'Beautiful Soup parser used on the Wikipedia pages')
+	args = argParser.parse_args()
+
+	if args.memory and args.timings is None:
+		argParser.error('--memory needs --timings to give the file the report is written to')
+
+	# Collects the tables of every season, combining them once all seasons are done
+	accumulator = SeasonAccumulator(args.spill)
+
+	# Each season is saved here as soon as it finishes, so a run that stops part way through can be resumed
+	store = SeasonStore(storeDirectory)
+
+	cache = page_cache.PageCache(cacheDirectory, ttl = cacheTTL, maxBytes = cacheMaxBytes, offline = offline)
+
+	toProcess = seasons
+	sources = {}
+	if args.incremental:
+		sources = findChangedSeasons(seasons, store, cache)
+		toProcess = [season for season in seasons if season[0] in sources]
+		print(str(len(seasons) - len(toProcess)) + ' seasons unchanged, processing ' + str(len(toProcess)))
+	elif args.resume:
+		toProcess = [season for season in seasons if not store.isComplete(season[0])]
+		print(str(len(seasons) - len(toProcess)) + ' seasons already complete, processing ' + str(len(toProcess)))
+
+	# With --pipelined each season is uploaded on a background thread while the next is fetched and parsed
+	writer = None
+	if args.pipelined:
+		writer = db_loader.BackgroundWriter()
+
+	# Only records anything when --timings or --profile is given. --memory adds tracemalloc figures to the timings
+	instrumentation = Instrumentation(enabled = args.timings is not None or args.profile is not None, profileDirectory = args.profile, memory = args.memory)
+
+	# Seasons that could not be fetched or parsed, and seasons whose own tables failed to upload with --pipelined
+	failures = {}
+	uploadFailures = {}
+	if args.parallel:
+		results = runParallel(toProcess, cache, args.fetch_workers, args.workers, args.parser, failures, writer, instrumentation, uploadFailures)
+	else:
+		results = runSerial(toProcess, cache, args.parser, failures, writer, instrumentation, uploadFailures)
+
+	# Leaving the block waits for the last seasons to finish uploading. A season whose upload fails is added to uploadFailures, so it is recorded in the store like any
+	#	other failed season once every upload has finished
+	with writer if writer is not None else nullcontext():
+		for currContestants, currEpisodes, record in results:
+			# Add this seasons data to the all seasons tables
+			accumulator.add(currContestants, currEpisodes, record)
+			with instrumentation.stage(record.seasonNum, 'checkpoint'):
+				store.save(record.seasonNum, currContestants, currEpisodes, record, sources.get(record.seasonNum))
+
+			print(record)
+
+	if writer is not None and len(uploadFailures) == 0:
+		print('Upload Successful')
+
+	# Every page has been fetched, so the last use of the pages read from the cache is saved
+	cache.close()
+
+	failures.update(uploadFailures)
+	for seasonNum, ex in failures.items():
+		store.recordFailure(seasonNum, ex)
+		
+	# Make DataFrames holding information on each season, and on the contestants and episodes of every season
+	with instrumentation.stage(None, 'combine'):
+		finalSeasons = accumulator.seasons()
+		allContestants = accumulator.contestants()
+		allEpisodes = accumulator.episodes()
+
+		# A season whose own tables failed to upload is recorded as failed, so it is left out of the all seasons tables too and processed again by a resumed run
+		finalSeasons, allContestants, allEpisodes = (dropSeasons(frame, uploadFailures) for frame in [finalSeasons, allContestants, allEpisodes])
+
+	if instrumentation.memory:
+		instrumentation.count(None, 'allContestantsFrameBytes', frameBytes(allContestants))
+		instrumentation.count(None, 'allEpisodesFrameBytes', frameBytes(allEpisodes))
+
+	seasonNums = [season[0] for season in seasons]
+	storedNums = [seasonNum for seasonNum in store.completedSeasons() if seasonNum in seasonNums]
+
+	if args.resume and not args.incremental and len(storedNums) > 0:
+		# Seasons finished by earlier runs are only in the store, so the all seasons tables are read back from it
+		finalSeasons, allContestants, allEpisodes = store.load(storedNums)
 
-allContestants = pd.DataFrame()
-allEpisodes = pd.DataFrame()
+	if len(finalSeasons) == 0:
+		print('Nothing to upload')
 
-for season in seasons:
-	# Creates DataFrames for the season and uploads them to the RDS
-	temp = season_data.SeasonData(season[0], season[1], season[2], season[3], season[4], season[5], season[6], season[7], season[8], season[9])
-	currContestants, currEpisodes = temp.makeFinalTables()
+	elif args.incremental:
+		# Only the changed seasons are replaced in the all seasons tables, every other season's rows stay as they are
+		changedNums = [record.seasonNum for record in accumulator.records if record.seasonNum not in uploadFailures]
 
-	# Add this seasons data to the all seasons tables
-	allContestants = pd.concat([allContestants, currContestants])
-	allEpisodes = pd.concat([allEpisodes, currEpisodes])
+		try:
+			with instrumentation.stage(None, 'upload'):
+				db_loader.replaceSeasons(finalSeasons, 'allSeason', 'overall', changedNums)
+				db_loader.replaceSeasons(allContestants, 'allContestants', 'overall', changedNums)
+				db_loader.replaceSeasons(allEpisodes, 'allEpisodes', 'overall', changedNums)
+			print('Upload Successful')
 
-	forSeasonTable.append(str(temp).split(', '))
-	print(temp)
-	
-# Make a DataFrame holding information on each season
-finalSeasons = pd.DataFrame(forSeasonTable, columns = ['Season Name', 'Season Number', 'Winner', 'Number of Days', 'Number of Players', 'Number of Tribe Swaps', 'Number of Starting Tribes', 'Number at Final Tribal', 'Number on Jury', 'Has Players Reenter?', 'Has Returning Players?', 'All Returning Players?', 'Number of Returning Players', 'Has Exile Island?', 'Has Redemption Island?', 'Is Blood vs Water?', 'Has Island Game?', 'Has Edge of Extinction?'])
+		except Exception as ex:
+			print('Upload Unsucessful', ex)
 
-# Upload the information to the RDS server
-try:
-	engine = create_engine(name_or_url = 'postgresql://' + user + ':' + password + '@' + host + ':' + port + '/' + database)
-	print('Connection Successful')
+		if args.export and len(storedNums) > 0:
+			finalSeasons, allContestants, allEpisodes = store.load(storedNums)
 
-	finalSeasons.to_sql('allSeason', engine, schema = 'overall', if_exists = 'replace', index = False)
-	allContestants.to_sql('allContestants', engine, schema = 'overall', if_exists = 'replace', index = False)
-	allEpisodes.to_sql('allEpisodes', engine, schema = 'overall', if_exists = 'replace', index = False)
+	else:
+		# Upload the information to the RDS server
+		try:
+			with instrumentation.stage(None, 'upload'):
+				db_loader.loadFrame(finalSeasons, 'allSeason', 'overall')
+				db_loader.loadFrame(allContestants, 'allContestants', 'overall')
+				db_loader.loadFrame(allEpisodes, 'allEpisodes', 'overall')
+			print('Upload Successful')
 
-except Exception as ex:
-	print('Connection Unsucessful', ex)
+		except Exception as ex:
+			print('Upload Unsucessful', ex)
 
+	if args.export:
+		columnar_export.exportTables(finalSeasons, allContestants, allEpisodes, args.export)
 
+	if args.timings:
+		instrumentation.writeReport(args.timings)
 
+	if len(failures) > 0:
+		print('Seasons that failed: ' + ', '.join(str(seasonNum) for seasonNum in failures) + '. The errors are recorded in ' + store.failuresPath + ', rerun with --resume to process only these seasons')
@@ -0,0 +1,70 @@
+from bs4 import BeautifulSoup
+
+import re
+import time
+
+
+# Matches the pieces of a page that matter when looking for tables. Comments, scripts and styles are matched so that any table tags written inside them are skipped
+tagPattern = re.compile(r'<!--.*?-->|<(script|style)\b.*?</\1\s*>|<(/?)table\b[^>]*>', re.IGNORECASE | re.DOTALL)
+
+# Matches each row of a table, which benchmarkParsing.py uses to count the rows of the tables it times
+rowPattern = re.compile(r'<tr\b.*?</tr\s*>', re.IGNORECASE | re.DOTALL)
+
+
+class TableLocator():
+	""" Finds the tables in a page and only parses the ones that are used
+
+		Scans the raw HTML of a page once to record where each table starts and ends. A table is only turned into a Beautiful Soup object the first time it is asked
+			for, by parsing just its part of the page. Tables are numbered in the same order as BeautifulSoup.findAll('table'), so the locator can be indexed like the
+			list findAll would return
+
+		Attributes:
+			html: A string holding the HTML of the page
+			parser: A string indicating the Beautiful Soup parser used on the tables that are asked for
+			positions: A list of tuples, each holding the start and end index of a table within html
+			parsed: A dictionary holding the index of each table that has been asked for as keys and the Beautiful Soup object holding it as values
+			parseWallSeconds: A float holding the wall clock seconds spent building Beautiful Soup objects
+			parseCpuSeconds: A float holding the CPU seconds spent building Beautiful Soup objects
+
+	"""
+
+	def __init__(self, html, parser = 'html.parser'):
+		self.html = html
+		self.parser = parser
+		self.positions = []
+		self.parsed = {}
+		self.parseWallSeconds = 0.0
+		self.parseCpuSeconds = 0.0
+
+		openTables = []	# Indices of tables whose start tag has been seen but whose end tag has not, so nested tables are matched to the right end tag
+
+		for match in tagPattern.finditer(html):
+			if match.group(2) is None:	# A comment, script or style
+				continue
+
+			if match.group(2) == '':
+				openTables.append(len(self.positions))
+				self.positions.append([match.start(), len(html)])
+			elif len(openTables) > 0:
+				self.positions[openTables.pop()][1] = match.end()
+
+		self.positions = [tuple(position) for position in self.positions]
+
+	def __len__(self):
+		return len(self.positions)
+
+	def __getitem__(self, index):
+		if index < 0:
+			index += len(self.positions)
+
+		if index not in self.parsed:
+			start, end = self.positions[index]
+			wallStart = time.perf_counter()
+			cpuStart = time.thread_time()
+
+			self.parsed[index] = BeautifulSoup(self.html[start:end], self.parser).find('table')
+
+			self.parseWallSeconds += time.perf_counter() - wallStart
+			self.parseCpuSeconds += time.thread_time() - cpuStart
+
+		return self.parsed[index]
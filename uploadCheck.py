@@ -0,0 +1,127 @@
+from sqlalchemy import create_engine
+
+import pandas as pd
+import numpy as np
+
+import argparse
+import json
+import sys
+
+import db_loader
+import parser_backend
+import season_data
+from benchmarkParsing import loadPages
+from seasons import cacheDirectory
+
+
+# CHECK SETTINGS
+### The tables are loaded into checkSchema, or into tables named checkSchema_table on databases without schemas, so nothing the scraper loads is touched
+checkSchema = 'uploadcheck'
+databaseUrl = 'sqlite:///uploadCheck.db'
+
+
+def readBack(table, engine):
+	""" Reads a table loaded by loadFrame back into a DataFrame
+
+		Args:
+			table: A string holding the name of the table
+			engine: A SQLAlchemy Engine
+
+		Returns:
+			A DataFrame holding the table, with list columns stored as JSON text turned back into lists
+	"""
+	if engine.dialect.name == 'postgresql':
+		return pd.read_sql_table(table, engine, schema = checkSchema)
+
+	frame = pd.read_sql_table(checkSchema + '_' + table, engine)
+	for column in db_loader.arrayColumns:
+		if column in frame.columns:
+			frame[column] = frame[column].map(lambda x: json.loads(x) if isinstance(x, str) and x.startswith('[') else x)
+
+	return frame
+
+
+def sameValue(expected, actual):
+	if isinstance(expected, (list, tuple, np.ndarray)):
+		return isinstance(actual, (list, tuple, np.ndarray)) and [str(x) for x in expected] == [str(x) for x in actual]
+	elif expected is None or (isinstance(expected, float) and np.isnan(expected)):
+		return actual is None or (isinstance(actual, float) and np.isnan(actual))
+	else:
+		return str(expected) == str(actual)
+
+
+def checkFrame(frame, table, seasonNum, engine):
+	""" Loads a frame, then replaces its season, checking after each that the table holds the same rows and that every column that can hold lists came back unchanged
+
+		Args:
+			frame: A DataFrame holding one season's contestants or episodes
+			table: A string holding the name of the table to load it into
+			seasonNum: An integer indicating the season's number
+			engine: A SQLAlchemy Engine
+
+		Returns:
+			A list of strings describing each problem found, which is empty if the frame loaded correctly
+	"""
+	problems = []
+
+	for step in ['loadFrame', 'replaceSeasons']:
+		try:
+			if step == 'loadFrame':
+				db_loader.loadFrame(frame, table, checkSchema, engine)
+			else:
+				db_loader.replaceSeasons(frame, table, checkSchema, [seasonNum], engine)
+		except Exception as ex:
+			problems.append(table + ' ' + step + ' failed: ' + str(ex))
+			break
+
+		loaded = readBack(table, engine)
+
+		if len(loaded.index) != len(frame.index):
+			problems.append(table + ' ' + step + ' holds ' + str(len(loaded.index)) + ' rows instead of ' + str(len(frame.index)))
+			continue
+
+		for column in db_loader.arrayColumns:
+			if column not in frame.columns:
+				continue
+
+			for expected, actual in zip(frame[column], loaded[column]):
+				if not sameValue(expected, actual):
+					problems.append(table + ' ' + step + ' changed ' + column + ' from ' + repr(expected) + ' to ' + repr(actual))
+					break
+
+	return problems
+
+
+if __name__ == '__main__':
+	argParser = argparse.ArgumentParser(description = 'Load the contestants and episodes built from the saved season pages into a database and check they come back unchanged')
+	argParser.add_argument('--corpus', help = 'fixture corpus to read the pages from, instead of the page cache')
+	argParser.add_argument('--cache', default = cacheDirectory, help = 'page cache holding the saved season pages')
+	argParser.add_argument('--database', default = databaseUrl, help = 'url of the database to load into, such as a scratch Postgresql database')
+	argParser.add_argument('--seasons', type = int, nargs = '+', help = 'only check these seasons')
+	args = argParser.parse_args()
+
+	engine = create_engine(args.database)
+
+	pages = loadPages(args.corpus, args.cache)
+	if args.seasons is not None:
+		pages = [(season, html) for season, html in pages if season[0] in args.seasons]
+
+	if len(pages) == 0:
+		print('No saved season pages to check')
+		sys.exit(1)
+
+	problems = []
+	for season, html in pages:
+		temp = season_data.SeasonData(season[0], season[1], season[2], season[3], season[4], season[5], season[6], season[7], season[8], season[9], html = html, parser = parser_backend.defaultParser)
+		contestants, episodes = temp.makeFinalTables(upload = False)
+
+		problems += checkFrame(contestants, 'contestants', season[0], engine)
+		problems += checkFrame(episodes, 'episodes', season[0], engine)
+
+	for problem in problems:
+		print(problem)
+
+	if len(problems) > 0:
+		sys.exit(1)
+
+	print('Loaded', len(pages), 'seasons of contestants and episodes into', engine.dialect.name, 'without changes')
@@ -1,11 +1,37 @@
-import requests
 from bs4 import BeautifulSoup
 
-import pandas as pd
+import argparse
+import csv
+import os
 import re
+import shutil
+from contextlib import nullcontext
 
+from bio_store import BioStore, cleanBio, storeDirectory
+from crawler import Crawler
+import parser_backend
 
-def makePersonList(name, season, person, half):
+
+# CRAWLER SETTINGS
+### maxWorkers is the number of pages downloaded at once and hostLimit the number downloaded at once from CBS. Failed requests are retried up to retries times,
+###	waiting backoff seconds before the first retry and twice as long before each one after it
+maxWorkers = 16
+hostLimit = 8
+retries = 4
+backoff = 0.5
+
+url = 'https://www.cbs.com/shows/survivor/cast/'
+
+# The HTML of each bio can also be written to a csv file, as earlier versions of the script did, with these columns
+columns = ['Name', 'Season Number', 'Link to Bio']
+
+baseURL = 'https://www.cbs.com'
+
+# Splits the bio of a pair of cast members, such as on Blood vs. Water seasons, into each person's half
+namePattern = re.compile(r'<strong>Name:</strong>|<strong>Name \(Age\):</strong>|<strong>Name \(Age\)</strong>:|<strong>Name</strong>:|<strong>Name \(Age\): </strong>|<strong>Name: </strong>')
+
+
+def makePersonList(name, season, bioContent, half):
 	# Create the list for each person to append to the main list
 	entry = []
 
@@ -15,65 +41,37 @@ def makePersonList(name, season, person, half):
 	# Add season number to list
 	entry.append(season)
 
-	# Add url to list
-	bioURL = baseURL + person['href']
-
-	bioData = requests.get(bioURL)
-	bioHtml = BeautifulSoup(bioData.text, 'html.parser')
-
-
 	## WORKING ON THIS paRT< nEed to clean the text and split for blood vs water seasons
-	bioContent = bioHtml.find(class_ = 'cast-bio')
-
-
 	if half == 0: # They are not part of a pair
 		# Add url to list
 		entry.append(bioContent)
 	elif half == 1: # they are the first half of a pair
-		split_string = re.split(r'<strong>Name:</strong>|<strong>Name \(Age\):</strong>|<strong>Name \(Age\)</strong>:|<strong>Name</strong>:|<strong>Name \(Age\): </strong>|<strong>Name: </strong>', str(bioContent))
-
-		print(len(split_string), season)
-
-		for string in split_string:
-			print(string)
+		split_string = namePattern.split(str(bioContent))
 
 		entry.append(split_string[1])
 
 	elif half == 2: # they are the second half of a pair
-		split_string = re.split(r'<strong>Name:</strong>|<strong>Name \(Age\):</strong>|<strong>Name \(Age\)</strong>:|<strong>Name</strong>:|<strong>Name \(Age\): </strong>|<strong>Name: </strong>', str(bioContent))
-
-		print(len(split_string), season)
-
-		for string in split_string:
-			print(string)
+		split_string = namePattern.split(str(bioContent))
 
 		entry.append(split_string[2])
 
 	return entry
 
 
-url = 'https://www.cbs.com/shows/survivor/cast/'
-
-baseURL = 'https://www.cbs.com'
-
-data = requests.get(url)
-html = BeautifulSoup(data.text, 'html.parser')
-
-# Get the current number of seasons based on how many links are in the drop down
-numSeasons = len(html.find('li', class_ = 'pv-h').find('ul').findAll('li'))
-
-# allCast is a list of lists, each list holding the cast members name, season number, and a link to their bio
-allCast = []
+def findCast(season, seasonHtml):
+	""" Finds the cast members listed on a season's cast page
 
+		Leaves out mentors and Jeff Probst, and splits pairs listed together, such as on Blood vs. Water seasons, into one entry per person
 
-# Seasons that are currently problems: 1 - 26 (only first names) and 27 and 29 (blood vs water season)
+		Args:
+			season: An integer indicating the season's number
+			seasonHtml: A Beautiful Soup object holding the season's cast page
 
-for season in range(1, numSeasons + 1):
-
-	seasonUrl = url + 'season/' + str(season) + '/'
-
-	seasonData = requests.get(seasonUrl)
-	seasonHtml = BeautifulSoup(seasonData.text, 'html.parser')
+		Returns:
+			A list of tuples, each holding a cast member's name, the season number, the url of their bio and which half of a pair they are, with 0 meaning they are
+				not part of a pair
+	"""
+	cast = []
 
 	castList = seasonHtml.find('div', class_ = 'grid-view-container').findAll('a')
 
@@ -89,34 +87,200 @@ for season in range(1, numSeasons + 1):
 		except AttributeError:
 			pass
 
-
-
 		if (meta != 'Mentor') and 'Jeff Probst' not in name:
-
-			half = 0
+			bioURL = baseURL + person['href']
 
 			if ' & ' in name:
 				names = name.split(' & ')
+			elif ' and ' in name:
+				names = name.split(' and ')
+			else:
+				names = [name]
 
+			if len(names) == 1:
+				cast.append((name, season, bioURL, 0))
+			else:
+				for half in range(1, len(names) + 1):
+					cast.append((names[half - 1], season, bioURL, half))
 
+	return cast
 
-				for name in names:
-					half += 1
 
-					allCast.append(makePersonList(name, season, person, half))
+def scrapeSeasons(crawler, seasonNums):
+	""" Scrapes the cast and bios of the given seasons, one season at a time
 
-			elif ' and ' in name:
-				names = name.split(' and ')
+		Every season's cast page is downloaded at once first. Then each season's bios are downloaded together and the season is handed back before moving on to the next,
+			so its rows can be written out straight away. Both halves of a pair share one bio page, so it is only downloaded and parsed once
 
-				for name in names:
-					half += 1
+		Args:
+			crawler: A Crawler used to download the pages
+			seasonNums: A list of integers holding the numbers of the seasons to scrape
 
-					allCast.append(makePersonList(name, season, person, half))
+		Yields:
+			The number of each season whose cast page was downloaded, in order, and a list of lists each holding a cast member's name, season number and bio
+	"""
+	seasonUrls = {season: url + 'season/' + str(season) + '/' for season in seasonNums}
+	seasonPages = crawler.fetchAll(list(seasonUrls.values()))
 
-			else:
+	for season in seasonNums:
+		page = seasonPages[seasonUrls[season]]
+		if isinstance(page, Exception):
+			print('Season', season, 'skipped, its cast page could not be downloaded', page)
+			continue
+
+		cast = findCast(season, BeautifulSoup(page, parser_backend.defaultParser))
+
+		bioPages = crawler.fetchAll([bioURL for name, seasonNum, bioURL, half in cast])
+
+		bios = {}
+		for bioURL, bioPage in bioPages.items():
+			if not isinstance(bioPage, Exception):
+				bios[bioURL] = BeautifulSoup(bioPage, parser_backend.defaultParser).find(class_ = 'cast-bio')
+
+		seasonCast = []
+		for name, seasonNum, bioURL, half in cast:
+			if bioURL not in bios:
+				print(name, 'of season', season, 'skipped, their bio could not be downloaded', bioPages[bioURL])
+				continue
+
+			seasonCast.append(makePersonList(name, season, bios[bioURL], half))
+
+		yield season, seasonCast
+
+
+def readCsvSeasons(csvPath):
+	""" Finds the seasons already written to a csv file by an earlier run
+
+		Args:
+			csvPath: A string holding the path of the csv file
+
+		Returns:
+			A set of integers holding the season numbers in the file, or None if the file does not exist or does not start with the header writeSeasons writes, in
+				which case it is written again from the start
+	"""
+	try:
+		with open(csvPath, newline = '', encoding = 'utf-8') as bioFile:
+			reader = csv.reader(bioFile)
+			if next(reader, None) != columns:
+				return None
+
+			return {int(row[1]) for row in reader if len(row) == len(columns)}
+
+	except FileNotFoundError:
+		return None
+
+
+def writeSeasons(crawler, seasonNums, store, csvPath = None, append = False, csvSeasons = ()):
+	""" Scrapes seasons and stores each one's bios as soon as it is done
+
+		Each bio is cleaned to plain text before it is stored, after pairs sharing a bio have been split. The store is flushed to disk after every season, so a run that
+			stops part way through keeps every season it finished
+
+		Args:
+			crawler: A Crawler used to download the pages
+			seasonNums: A list of integers holding the numbers of the seasons to scrape
+			store: A BioStore the bios are added to
+			csvPath: A string holding the path of a csv file to also write the HTML of each bio to, in the same format DataFrame.to_csv uses, or None to not write one
+			append: A boolean indicating if the rows should be added to the end of an existing csv file rather than replacing it
+			csvSeasons: A collection of integers holding the numbers of the seasons already in the csv file, whose rows are not written to it again
+
+		Returns:
+			An integer indicating the number of cast members stored
+	"""
+	numRows = 0
+
+	with open(csvPath, 'a' if append else 'w', newline = '', encoding = 'utf-8') if csvPath is not None else nullcontext() as bioFile:
+		if bioFile is not None:
+			writer = csv.writer(bioFile, lineterminator = os.linesep)
+			if bioFile.tell() == 0:
+				writer.writerow(columns)
+
+		for season, seasonCast in scrapeSeasons(crawler, seasonNums):
+			store.addSeason(season, [(name, cleanBio(bio)) for name, seasonNum, bio in seasonCast])
+
+			if bioFile is not None and season not in csvSeasons:
+				writer.writerows(seasonCast)
+				bioFile.flush()
+				os.fsync(bioFile.fileno())
+
+			numRows += len(seasonCast)
+			print('Season', season, 'written,', len(seasonCast), 'cast members')
+
+	return numRows
+
+
+def rebuildStore(crawler, seasonNums, store, csvPath = None):
+	""" Scrapes every season into a new store and swaps it in for the old one once the run finishes
+
+		The new store is built in a folder next to the old one, so a run that stops part way through leaves the old store as it was. Seasons that could not be
+			scraped keep the bios the old store holds for them. The old folder is then moved aside and the new one moved into its place, dropping the search index and
+			match table kept with the old store, which are rebuilt the next time they are used
+
+		Args:
+			crawler: A Crawler used to download the pages
+			seasonNums: A list of integers holding the numbers of the seasons to scrape
+			store: The BioStore to replace
+			csvPath: A string holding the path of a csv file to also write the HTML of each bio to, or None to not write one
+
+		Returns:
+			A BioStore holding the new bios, kept in the old store's folder
+	"""
+	directory = store.directory.rstrip(os.sep)
+	buildDirectory = directory + '.new'
+	oldDirectory = directory + '.old'
+
+	shutil.rmtree(buildDirectory, ignore_errors = True)
+	built = BioStore(buildDirectory)
+
+	writeSeasons(crawler, seasonNums, built, csvPath)
+
+	builtSeasons = set(built.seasons())
+	for season in store.seasons():
+		if season not in builtSeasons:
+			built.addSeason(season, [(name, bio) for seasonNum, name, bio in store.items([season])])
+			print('Season', season, 'kept from the old store')
+
+	shutil.rmtree(oldDirectory, ignore_errors = True)
+	os.replace(directory, oldDirectory)
+	os.replace(buildDirectory, directory)
+	shutil.rmtree(oldDirectory)
+
+	return BioStore(directory)
+
+
+if __name__ == '__main__':
+	argParser = argparse.ArgumentParser(description = 'Scrape the name, season and bio of every Survivor cast member from CBS')
+	argParser.add_argument('--incremental', action = 'store_true', help = 'only scrape the seasons missing from the bio store, or from the --csv file, and add them to it')
+	argParser.add_argument('--store', default = storeDirectory, help = 'folder the bio store is kept in')
+	argParser.add_argument('--csv', help = 'csv file to also write the HTML of each bio to, as earlier versions did')
+	args = argParser.parse_args()
+
+	crawler = Crawler(maxWorkers, hostLimit, retries, backoff)
+
+	html = BeautifulSoup(crawler.get(url), parser_backend.defaultParser)
+
+	# Get the current number of seasons based on how many links are in the drop down
+	numSeasons = len(html.find('li', class_ = 'pv-h').find('ul').findAll('li'))
+
+	# Seasons that are currently problems: 1 - 26 (only first names) and 27 and 29 (blood vs water season)
+
+	store = BioStore(args.store)
+
+	seasonNums = list(range(1, numSeasons + 1))
+	if args.incremental:
+		saved = set(store.seasons())
 
-				allCast.append(makePersonList(name, season, person, half))
+		# The csv file is only added to if it already holds rows written by an earlier run, and any season missing from it is scraped again, even if it is stored
+		csvSeasons = None
+		if args.csv is not None:
+			csvSeasons = readCsvSeasons(args.csv)
+			saved &= csvSeasons if csvSeasons is not None else set()
 
+		seasonNums = [season for season in seasonNums if season not in saved]
+		print(len(saved), 'seasons already saved, scraping', len(seasonNums))
 
-df = pd.DataFrame(allCast, columns=['Name', 'Season Number', 'Link to Bio'])
-df.to_csv('nameSeasonBio.csv', index=False)
+		# Each season's cast members are stored, with their name, season number, and bio, as soon as the season is scraped
+		writeSeasons(crawler, seasonNums, store, args.csv, append = csvSeasons is not None, csvSeasons = csvSeasons or set())
+	else:
+		# Every season is scraped again into a new store, which only replaces the old one once the run finishes
+		rebuildStore(crawler, seasonNums, store, args.csv)